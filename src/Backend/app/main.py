@@ -1,5 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from src.cassette import install_cassette
+
+# CASSETTE_MODE=record|replay: must wrap the LLM clients before they are built
+install_cassette()
+
 from src.Backend.app.routes import router
+from src.shared_memory import warm_up_shared_memory, flush_shared_memory
+from src.http_pool import aclose_http_pools
+from src.tracing import flush_traces
+from src.metrics import render_metrics
 
 app = FastAPI(
     title="Agent Orchestration API",
@@ -9,6 +19,34 @@ app = FastAPI(
 
 app.include_router(router)
 
+@app.on_event("startup")
+def warm_up():
+    # Load MiniLM + FAISS once, before the first request pays for it
+    try:
+        warm_up_shared_memory()
+    except Exception as e:
+        print(f"⚠️ Shared memory warm-up failed: {e}")
+
+@app.on_event("shutdown")
+def flush_pending_facts():
+    # Write-behind queue: persist facts saved by the last requests
+    flush_shared_memory()
+
+@app.on_event("shutdown")
+async def close_http_pools():
+    # Pooled keep-alive connections of the network tools
+    await aclose_http_pools()
+
+@app.on_event("shutdown")
+def flush_trace_export():
+    # Spans still queued for the JSONL exporter
+    flush_traces()
+
 @app.get("/")
 def health_check():
     return {"status": "ok", "message": "Agent Orchestration API running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
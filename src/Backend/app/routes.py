@@ -1,16 +1,95 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
 from src.Backend.app.schemas import TaskRequest, TaskResponse
 
 # import your existing orchestrator
-from src.orchestrator import run_multi_agent_workflow
+from src.orchestrator import arun_multi_agent_workflow, astream_multi_agent_workflow
+from src.multi_agents import agent_registry, tool_selection_stats
+from src.router.planner_fastpath import fastpath_stats
+from src.router.local_router import local_router_stats
+from src.semantic_cache import semantic_cache
+from src.embedding_cache import embedding_cache_stats
+from src.tool_cache import tool_cache_stats
+from src.tracing import recent_spans, tracing_stats
+from src.cassette import cassette_stats
+from src.shared_memory import get_shared_memory
+from src.memory import session_memory
+from src.llm import LLM_CACHE_ENABLED
+from src.llm_cache import LLM_CACHE_BYPASS_HEADER, get_llm_cache, llm_cache_bypass, is_bypass_requested
+import json
 
 router = APIRouter()
 
+
+def format_sse(event: dict) -> str:
+    """Encode an orchestrator event as a Server-Sent-Events frame"""
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
 @router.post("/run", response_model=TaskResponse)
-def run_task(request: TaskRequest):
-    result = run_multi_agent_workflow(request.query)
+async def run_task(
+    request: TaskRequest,
+    x_llm_cache: str = Header(default=None, alias=LLM_CACHE_BYPASS_HEADER)
+):
+    # Native async: the worker's event loop holds the request while agents
+    # wait on the LLM instead of pinning a threadpool thread
+    with llm_cache_bypass(is_bypass_requested(x_llm_cache)):
+        result = await arun_multi_agent_workflow(request.query, session_id=request.session_id)
 
     return TaskResponse(
         status="success",
-        output=result
+        output=result,
+        session_id=request.session_id
+    )
+
+
+@router.post("/run/stream")
+async def run_task_stream(
+    request: TaskRequest,
+    x_llm_cache: str = Header(default=None, alias=LLM_CACHE_BYPASS_HEADER)
+):
+    """
+    Same workflow as /run, streamed as Server-Sent Events:
+    stage events, then tokens of the final answer, then a done event.
+    """
+    bypass_cache = is_bypass_requested(x_llm_cache)
+
+    async def event_source():
+        with llm_cache_bypass(bypass_cache):
+            try:
+                async for event in astream_multi_agent_workflow(
+                    request.query, session_id=request.session_id
+                ):
+                    yield format_sse(event)
+            except Exception as e:
+                yield format_sse({"event": "error", "message": str(e)})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+
+
+@router.get("/stats")
+def stats():
+    return {
+        "agents": agent_registry.stats(),
+        "research_tools": tool_selection_stats(),
+        "planner_fastpath": fastpath_stats(),
+        "local_router": local_router_stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "tool_cache": tool_cache_stats(),
+        "tracing": tracing_stats(),
+        "cassette": cassette_stats(),
+        "shared_memory_index": get_shared_memory().index_stats(),
+        "sessions": session_memory.stats(),
+        "llm_cache": get_llm_cache().stats() if LLM_CACHE_ENABLED else {"enabled": False}
+    }
+
+
+@router.get("/traces")
+def traces(limit: int = 100, trace_id: str = None):
+    """Most recent finished spans (router, agents, tools), oldest first"""
+    return {"spans": recent_spans(limit, trace_id)}
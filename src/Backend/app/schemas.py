@@ -1,8 +1,12 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class TaskRequest(BaseModel):
     query: str
+    # Reuse the same id across turns to keep per-agent conversation history
+    session_id: Optional[str] = None
 
 class TaskResponse(BaseModel):
     status: str
     output: str
+    session_id: Optional[str] = None
@@ -1,9 +1,35 @@
 import streamlit as st
 import requests
+import json
 import time
+import uuid
 
 # ================= CONFIG =================
 API_URL = "http://127.0.0.1:8000/run"
+STREAM_URL = f"{API_URL}/stream"
+
+STAGE_LABELS = {
+    "router": "🧭 Request routed",
+    "cache": "♻️ Answer reused from cache",
+    "planner": "🗺️ Plan ready",
+    "researcher": "🔎 Research done",
+    "summarizer": "📝 Summary ready",
+    "email": "✉️ Email drafted",
+}
+
+
+def stream_events(query: str, session_id: str = None):
+    """Yield orchestrator events from the backend SSE stream"""
+    with requests.post(
+        STREAM_URL,
+        json={"query": query, "session_id": session_id},
+        stream=True,
+        timeout=300
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if line and line.startswith("data:"):
+                yield json.loads(line[len("data:"):].strip())
 
 st.set_page_config(
     page_title="Agent Chat",
@@ -131,6 +157,10 @@ st.markdown(
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Lets the backend keep agent history across turns of this chat
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+
 # ================= CHAT HISTORY =================
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
@@ -150,35 +180,57 @@ if prompt:
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Assistant message
+    # Assistant message (rendered incrementally from the SSE stream)
     with st.chat_message("assistant"):
-        with st.spinner("🤝 Agents are collaborating..."):
-            try:
-                start_time = time.time()
+        status = st.status("🤝 Agents are collaborating...", expanded=False)
+        placeholder = st.empty()
+
+        try:
+            start_time = time.time()
+            first_token_at = None
+            output = ""
+
+            for event in stream_events(prompt, st.session_state.session_id):
+                kind = event.get("event")
+
+                if kind == "stage":
+                    label = STAGE_LABELS.get(event["stage"], event["stage"])
+                    status.update(label=label)
+                    status.write(label)
+
+                elif kind == "token":
+                    if first_token_at is None:
+                        first_token_at = time.time() - start_time
+                    output += event["text"]
+                    placeholder.markdown(output + "▌")
+
+                elif kind == "done":
+                    output = event.get("output") or "No response received."
+
+                elif kind == "error":
+                    raise RuntimeError(event.get("message"))
 
-                response = requests.post(
-                    API_URL,
-                    json={"query": prompt},
-                    timeout=300
-                )
+            elapsed = time.time() - start_time
 
-                data = response.json()
-                output = data.get("output", "No response received.")
-                elapsed = time.time() - start_time
+            placeholder.markdown(output)
+            status.update(label="✅ Done", state="complete")
 
-                st.markdown(output)
+            if first_token_at is not None:
+                st.caption(f"⏱️ first token {first_token_at:.2f}s · total {elapsed:.2f} seconds")
+            else:
                 st.caption(f"⏱️ {elapsed:.2f} seconds")
 
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": output
-                })
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": output
+            })
 
-            except Exception as e:
-                error_msg = f"❌ Backend error: {e}"
-                st.error(error_msg)
+        except Exception as e:
+            error_msg = f"❌ Backend error: {e}"
+            status.update(label="❌ Failed", state="error")
+            st.error(error_msg)
 
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg
-                })
\ No newline at end of file
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": error_msg
+            })
@@ -0,0 +1,152 @@
+import math
+import os
+
+import faiss
+import numpy as np
+
+# FAISS index selection for the shared memory.
+# Small stores use an exact flat scan. Past SHARED_MEMORY_HNSW_THRESHOLD
+# facts they switch to HNSW, and past SHARED_MEMORY_IVF_THRESHOLD to
+# IVF-Flat. SHARED_MEMORY_INDEX pins one kind instead of "auto".
+# Stores are always loaded into a flat index; the HNSW/IVF index is built
+# by the shared memory's background rebuild, never on the load path.
+
+INDEX_KINDS = ("auto", "flat", "hnsw", "ivf")
+INDEX_KIND = os.getenv("SHARED_MEMORY_INDEX", "auto").lower()
+HNSW_THRESHOLD = int(os.getenv("SHARED_MEMORY_HNSW_THRESHOLD", "20000"))
+IVF_THRESHOLD = int(os.getenv("SHARED_MEMORY_IVF_THRESHOLD", "500000"))
+
+HNSW_M = int(os.getenv("SHARED_MEMORY_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("SHARED_MEMORY_HNSW_EF_CONSTRUCTION", "200"))
+DEFAULT_EF_SEARCH = int(os.getenv("SHARED_MEMORY_EF_SEARCH", "64"))
+DEFAULT_NPROBE = int(os.getenv("SHARED_MEMORY_NPROBE", "16"))
+
+# IVF is retrained once the store has grown this much since the last training
+IVF_RETRAIN_GROWTH = 2.0
+IVF_TRAINING_POINTS_PER_LIST = 64
+
+
+def select_index_kind(count: int, kind: str = None) -> str:
+    """Index kind to use for a store holding count facts"""
+    kind = (kind or INDEX_KIND).lower()
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown shared memory index kind: {kind}")
+    if kind != "auto":
+        return kind
+    if count >= IVF_THRESHOLD:
+        return "ivf"
+    if count >= HNSW_THRESHOLD:
+        return "hnsw"
+    return "flat"
+
+
+def index_kind(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def ivf_nlist(count: int) -> int:
+    return max(1, min(int(4 * math.sqrt(count)), count // 39 or 1))
+
+
+def build_index(vectors, kind: str):
+    """
+    Build a populated FAISS index of the given kind over vectors [n, dim].
+    vectors may also be a list of [n_i, dim] blocks (e.g. a memory-mapped
+    snapshot plus the rows added since), added in order without joining them.
+    """
+    blocks = vectors if isinstance(vectors, list) else [vectors]
+    dim = blocks[0].shape[1]
+    blocks = [np.ascontiguousarray(block, dtype=np.float32) for block in blocks if len(block)]
+    count = sum(len(block) for block in blocks)
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = DEFAULT_EF_SEARCH
+    elif kind == "ivf":
+        nlist = ivf_nlist(count)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        sample = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        max_training = nlist * IVF_TRAINING_POINTS_PER_LIST
+        if len(sample) > max_training:
+            rows = np.random.default_rng(0).choice(len(sample), max_training, replace=False)
+            sample = sample[np.sort(rows)]
+        index.train(sample)
+        # Lets reconstruct() fetch stored vectors (near-duplicate checks)
+        index.make_direct_map()
+        index.nprobe = min(DEFAULT_NPROBE, nlist)
+    else:
+        index = faiss.IndexFlatL2(dim)
+
+    for block in blocks:
+        index.add(block)
+    return index
+
+
+def needs_rebuild(index, trained_count: int, kind: str = None) -> bool:
+    """Whether the index should be rebuilt for its current size"""
+    current = index_kind(index)
+    if current != select_index_kind(index.ntotal, kind):
+        return True
+    return current == "ivf" and index.ntotal >= trained_count * IVF_RETRAIN_GROWTH
+
+
+def search_params(index, ef_search: int = None, nprobe: int = None):
+    """Per-call recall/latency knobs; None keeps the index defaults"""
+    if isinstance(index, faiss.IndexHNSW) and ef_search is not None:
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    if isinstance(index, faiss.IndexIVF) and nprobe is not None:
+        return faiss.SearchParametersIVF(nprobe=int(nprobe))
+    return None
+
+
+def unit_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def greedy_dedup(vectors, threshold: float, chunk_size: int = 1024) -> np.ndarray:
+    """
+    For each row, the index of the earlier kept row it duplicates
+    (cosine >= threshold), or -1 when the row is kept.
+    """
+    unit = unit_rows(vectors)
+    owners = np.full(len(unit), -1, dtype=np.int64)
+    kept = faiss.IndexFlatIP(unit.shape[1])
+    kept_rows = []
+
+    for start in range(0, len(unit), chunk_size):
+        chunk = unit[start:start + chunk_size]
+        if kept.ntotal:
+            sims, positions = kept.search(chunk, 1)
+        else:
+            sims = np.full((len(chunk), 1), -1.0, dtype=np.float32)
+            positions = np.full((len(chunk), 1), -1)
+
+        chunk_kept = []
+        for offset, vector in enumerate(chunk):
+            row = start + offset
+            if positions[offset][0] != -1 and sims[offset][0] >= threshold:
+                owners[row] = kept_rows[positions[offset][0]]
+                continue
+            # Rows earlier in this chunk are not in the kept index yet
+            for other in chunk_kept:
+                if float(unit[other] @ vector) >= threshold:
+                    owners[row] = other
+                    break
+            else:
+                chunk_kept.append(row)
+
+        if chunk_kept:
+            kept.add(unit[chunk_kept])
+            kept_rows.extend(chunk_kept)
+
+    return owners
@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Offline end-to-end benchmark: no Gemini, Tavily or wttr.in calls.
+# Chat models are replaced by ScriptedChatModel (src/fake_llm.py), the
+# network tools get stub clients with a fixed delay, embeddings are
+# DeterministicFakeEmbedding unless --real-embeddings is given, and shared
+# memory / session memory live in a temporary directory.
+#
+#   python -m src.benchmark --requests 50 --concurrency 1,4,16 --target workflow,api
+#
+# Each run appends one JSON line (commit, config, per-target results) to
+# --output, so runs can be compared across commits.
+
+TARGETS = ("workflow", "api")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline orchestrator throughput benchmark")
+    parser.add_argument("--requests", type=int, default=50, help="measured requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--target", default="workflow,api", help="workflow (run_multi_agent_workflow) and/or api (POST /run)")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests before each target")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="+/- seconds of random LLM latency")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="seconds per stubbed network tool call")
+    parser.add_argument("--research-tools", default="web_search", help="tools the scripted researcher calls (empty: skip research)")
+    parser.add_argument("--email-ratio", type=float, default=0.0, help="share of requests with email intent")
+    parser.add_argument("--real-embeddings", action="store_true", help="use the MiniLM model instead of fake embeddings")
+    parser.add_argument("--verbose", action="store_true", help="keep the orchestrator's stdout logging")
+    parser.add_argument("--output", default="benchmark_results.jsonl", help="JSONL file the run summary is appended to")
+    return parser.parse_args(argv)
+
+
+# =========================
+# STUBBED NETWORK CLIENTS
+# =========================
+
+class _StubResponse:
+    def __init__(self, payload: dict):
+        self._payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> dict:
+        return self._payload
+
+
+def _weather_payload(url: str) -> dict:
+    city = url.rsplit("/", 1)[-1].split("?", 1)[0]
+    return {
+        "current_condition": [{"temp_C": "21"}],
+        "nearest_area": [{"areaName": [{"value": city}]}],
+    }
+
+
+def _search_payload(query: str) -> dict:
+    return {"results": [
+        {"title": f"Result {i} for {query[:40]}", "content": "Stub search content.", "url": f"https://example.com/{i}"}
+        for i in range(5)
+    ]}
+
+
+def install_tool_stubs(tool_latency: float):
+    """Point web_search / get_weather at in-process stubs with a fixed delay"""
+    import src.tools as tools
+
+    class StubSession:
+        def get(self, url, **kwargs):
+            time.sleep(tool_latency)
+            return _StubResponse(_weather_payload(url))
+
+    class StubAsyncClient:
+        async def get(self, url, **kwargs):
+            await asyncio.sleep(tool_latency)
+            return _StubResponse(_weather_payload(url))
+
+    class StubTavily:
+        def search(self, query, **kwargs):
+            time.sleep(tool_latency)
+            return _search_payload(query)
+
+    class StubAsyncTavily:
+        async def search(self, query, **kwargs):
+            await asyncio.sleep(tool_latency)
+            return _search_payload(query)
+
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+    tools.get_http_session = lambda name="default": StubSession()
+    tools.get_async_http_client = lambda name="default": StubAsyncClient()
+    tools.get_tavily_client = lambda api_key: StubTavily()
+    tools.get_async_tavily_client = lambda api_key: StubAsyncTavily()
+
+
+def install_fakes(args):
+    from src.fake_llm import ScriptedChatModel
+    from src.llm import set_llm_factory
+
+    research_tools = [name.strip() for name in args.research_tools.split(",") if name.strip()]
+
+    def factory(model, temperature, **kwargs):
+        return ScriptedChatModel(
+            model=model,
+            temperature=temperature,
+            latency=args.llm_latency,
+            jitter=args.llm_jitter,
+            research_tools=research_tools,
+            **kwargs
+        )
+
+    set_llm_factory(factory)
+    install_tool_stubs(args.tool_latency)
+
+    if not args.real_embeddings:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        import src.embedding_cache as embedding_cache
+
+        fake = DeterministicFakeEmbedding(size=384)
+        embedding_cache._embeddings = (
+            embedding_cache.CachedEmbeddings(fake) if embedding_cache.EMBEDDING_CACHE_ENABLED else fake
+        )
+
+
+# =========================
+# MEASUREMENT
+# =========================
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to the peak where /proc is missing)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(target: str, concurrency: int, latencies: list, errors: int, duration: float, rss_before: float) -> dict:
+    latencies = sorted(latencies)
+    rss_after = rss_mb()
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(len(latencies) / duration, 3) if duration else 0.0,
+        "latency_s": {
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(latencies[-1], 4) if latencies else 0.0,
+        },
+        "rss_mb": {
+            "before": round(rss_before, 1),
+            "after": round(rss_after, 1),
+            "delta": round(rss_after - rss_before, 1),
+            "peak": round(peak_rss_mb(), 1),
+        },
+    }
+
+
+def make_queries(count: int, offset: int, email_ratio: float) -> list:
+    queries = []
+    every = round(1 / email_ratio) if email_ratio > 0 else 0
+    for i in range(offset, offset + count):
+        if every and i % every == 0:
+            queries.append(f"Write an email to the team about benchmark topic {i}")
+        else:
+            queries.append(f"Compare recent industry trends for benchmark topic {i}")
+    return queries
+
+
+# =========================
+# DRIVERS
+# =========================
+
+def run_workflow(queries: list, concurrency: int, tag: str):
+    """Call run_multi_agent_workflow from a thread pool; return (latencies, errors, duration)"""
+    from src.orchestrator import run_multi_agent_workflow
+
+    def one(i_query):
+        i, query = i_query
+        started = time.perf_counter()
+        run_multi_agent_workflow(query, session_id=f"{tag}-{i}")
+        return time.perf_counter() - started
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(one, item) for item in enumerate(queries)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"⚠️ Workflow request failed: {e}")
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _run_api(queries: list, concurrency: int, tag: str):
+    import httpx
+    from src.Backend.app.main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None
+    ) as client:
+        async def one(i, query):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/run", json={"query": query, "session_id": f"{tag}-{i}"})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors += 1
+                    print(f"⚠️ /run request failed: {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, query) for i, query in enumerate(queries)))
+        duration = time.perf_counter() - started
+
+    return latencies, errors, duration
+
+
+def run_api(queries: list, concurrency: int, tag: str):
+    """POST /run through the ASGI app in-process; return (latencies, errors, duration)"""
+    return asyncio.run(_run_api(queries, concurrency, tag))
+
+
+DRIVERS = {"workflow": run_workflow, "api": run_api}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    targets = [t.strip() for t in args.target.split(",") if t.strip()]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        raise SystemExit(f"Unknown target(s): {', '.join(sorted(unknown))}")
+
+    # Isolate persistent state before any src module reads its settings
+    workdir = tempfile.mkdtemp(prefix="agent-benchmark-")
+    os.environ["SHARED_MEMORY_DIR"] = os.path.join(workdir, "faiss_index")
+    os.environ["SESSION_MEMORY_PATH"] = os.path.join(workdir, "session_memory.sqlite")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("PROMPT_TOKEN_LOGGING", "false")
+
+    install_fakes(args)
+
+    from src.shared_memory import flush_shared_memory, warm_up_shared_memory
+    warm_up_shared_memory()
+
+    # Orchestrator progress prints would dominate the output (not the timing)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    results = []
+    offset = 0
+    try:
+        for target in targets:
+            driver = DRIVERS[target]
+            if args.warmup:
+                with quiet:
+                    driver(make_queries(args.warmup, offset, args.email_ratio), 1, f"{target}-warmup")
+                offset += args.warmup
+
+            for concurrency in levels:
+                queries = make_queries(args.requests, offset, args.email_ratio)
+                offset += args.requests
+
+                rss_before = rss_mb()
+                with quiet:
+                    latencies, errors, duration = driver(queries, concurrency, f"{target}-c{concurrency}")
+                result = summarize(target, concurrency, latencies, errors, duration, rss_before)
+                results.append(result)
+
+                latency = result["latency_s"]
+                print(
+                    f"📊 {target:<8} c={concurrency:<3} {result['throughput_rps']:>8.2f} req/s  "
+                    f"p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  "
+                    f"errors {errors}  rss {result['rss_mb']['after']:.0f}MB ({result['rss_mb']['delta']:+.1f})"
+                )
+    finally:
+        flush_shared_memory()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"✅ Results appended to {args.output}")
+    return record
+
+
+if __name__ == "__main__":
+    main()
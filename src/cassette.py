@@ -0,0 +1,352 @@
+from collections import deque
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, List, Optional
+
+import httpx
+import requests
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Record/replay cassettes for LLM exchanges and network tool responses.
+# CASSETTE_MODE=record wraps every chat client built by get_llm (router,
+# chat, planner, researcher, summarizer, email) and the HTTP/Tavily clients
+# behind get_weather and web_search, and appends each exchange with its
+# latency to CASSETTE_PATH (JSONL). CASSETTE_MODE=replay serves them back
+# offline, sleeping elapsed * CASSETTE_TIME_SCALE (1 = original timing,
+# 0.1 = ten times faster, 0 = no delay).
+#
+# Entries are matched on a hash of the exact request (messages, model, bound
+# tools / URL / query). When a prompt differs from the recording (e.g. shared
+# memory grew), the next unused entry recorded at the same call site is used
+# instead, so a recorded session replays in order.
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "./cassettes/session.jsonl")
+CASSETTE_TIME_SCALE = float(os.getenv("CASSETTE_TIME_SCALE", "1.0"))
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded entry for a request"""
+
+
+def _hash(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """One cassette file: appended to while recording, consumed while replaying"""
+
+    def __init__(self, path: str = CASSETTE_PATH, mode: str = CASSETTE_MODE, time_scale: float = CASSETTE_TIME_SCALE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_site = {}
+        self._stats = {"recorded": 0, "replayed": 0, "fallbacks": 0, "misses": 0}
+
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                self._write({"version": CASSETTE_VERSION, "recorded_at": time.time()})
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if "kind" not in entry:
+                    continue  # header
+                entry["used"] = False
+                self._by_key.setdefault((entry["kind"], entry["key"]), deque()).append(entry)
+                self._by_site.setdefault((entry["kind"], entry["site"]), deque()).append(entry)
+
+    def _write(self, record: dict):
+        # Caller holds the lock (or is the constructor)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def record(self, kind: str, key: str, site: str, response, elapsed: float):
+        entry = {"kind": kind, "key": key, "site": site, "elapsed": round(elapsed, 4), "response": response}
+        with self._lock:
+            self._write(entry)
+            self._stats["recorded"] += 1
+
+    @staticmethod
+    def _pop_unused(entries) -> Optional[dict]:
+        while entries:
+            entry = entries.popleft()
+            if not entry["used"]:
+                return entry
+        return None
+
+    def take(self, kind: str, key: str, site: str) -> dict:
+        with self._lock:
+            entry = self._pop_unused(self._by_key.get((kind, key)))
+            if entry is None:
+                entry = self._pop_unused(self._by_site.get((kind, site)))
+                if entry is None:
+                    self._stats["misses"] += 1
+                    raise CassetteMiss(f"No recorded {kind} entry for {site}")
+                self._stats["fallbacks"] += 1
+            entry["used"] = True
+            self._stats["replayed"] += 1
+        return entry
+
+    def delay(self, entry: dict) -> float:
+        return max(0.0, entry.get("elapsed", 0.0) * self.time_scale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({"mode": self.mode, "path": self.path, "time_scale": self.time_scale})
+        return stats
+
+
+# =========================
+# LLM
+# =========================
+
+def _message_payload(message: BaseMessage) -> list:
+    return [message.type, message.content, getattr(message, "tool_calls", None) or None]
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records the wrapped model's replies or replays them"""
+
+    cassette: Any
+    inner: Any = None
+    model: str = ""
+    temperature: float = 0.0
+    tools: List[Any] = []
+    tool_kwargs: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tools": list(tools), "tool_kwargs": kwargs})
+
+    def _runnable(self):
+        if self.tools:
+            return self.inner.bind_tools(self.tools, **self.tool_kwargs)
+        return self.inner
+
+    def _request(self, messages: List[BaseMessage]):
+        tool_names = sorted(getattr(tool, "name", str(tool)) for tool in self.tools)
+        key = _hash([self.model, self.temperature, tool_names, [_message_payload(m) for m in messages]])
+        first = str(messages[0].content).strip().splitlines()[0] if messages and messages[0].content else ""
+        return key, f"{self.model}:{first[:80]}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        key, site = self._request(messages)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("llm", key, site)
+            time.sleep(self.cassette.delay(entry))
+            message = messages_from_dict([entry["response"]])[0]
+        else:
+            started = time.perf_counter()
+            message = self._runnable().invoke(messages, stop=stop)
+            self.cassette.record("llm", key, site, message_to_dict(message), time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        key, site = self._request(messages)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("llm", key, site)
+            await asyncio.sleep(self.cassette.delay(entry))
+            message = messages_from_dict([entry["response"]])[0]
+        else:
+            started = time.perf_counter()
+            message = await self._runnable().ainvoke(messages, stop=stop)
+            self.cassette.record("llm", key, site, message_to_dict(message), time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# =========================
+# NETWORK TOOLS
+# =========================
+
+class _ReplayResponse:
+    def __init__(self, response: dict, error_type):
+        self.status_code = response["status"]
+        self._payload = response.get("json")
+        self._error_type = error_type
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise self._error_type(f"{self.status_code} (replayed)")
+
+    def json(self):
+        return self._payload
+
+
+def _http_response(res) -> dict:
+    try:
+        payload = res.json()
+    except Exception:
+        payload = None
+    return {"status": res.status_code, "json": payload}
+
+
+class _CassetteHTTP:
+    """Stands in for a pooled requests session / httpx client (GET only)"""
+
+    def __init__(self, cassette: Cassette, name: str, client=None):
+        self.cassette = cassette
+        self.name = name
+        self.client = client
+
+    def get(self, url, **kwargs):
+        site = f"{self.name}:GET"
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("http", _hash([self.name, url]), site)
+            time.sleep(self.cassette.delay(entry))
+            return _ReplayResponse(entry["response"], requests.HTTPError)
+
+        started = time.perf_counter()
+        res = self.client.get(url, **kwargs)
+        self.cassette.record("http", _hash([self.name, url]), site, _http_response(res), time.perf_counter() - started)
+        return res
+
+
+class _AsyncCassetteHTTP(_CassetteHTTP):
+    async def get(self, url, **kwargs):
+        site = f"{self.name}:GET"
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("http", _hash([self.name, url]), site)
+            await asyncio.sleep(self.cassette.delay(entry))
+            return _ReplayResponse(entry["response"], httpx.HTTPError)
+
+        started = time.perf_counter()
+        res = await self.client.get(url, **kwargs)
+        self.cassette.record("http", _hash([self.name, url]), site, _http_response(res), time.perf_counter() - started)
+        return res
+
+
+class _CassetteTavily:
+    """Stands in for TavilyClient.search"""
+
+    def __init__(self, cassette: Cassette, client=None):
+        self.cassette = cassette
+        self.client = client
+
+    def search(self, query, **kwargs):
+        key = _hash([query, kwargs])
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("tavily", key, "tavily:search")
+            time.sleep(self.cassette.delay(entry))
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = self.client.search(query=query, **kwargs)
+        self.cassette.record("tavily", key, "tavily:search", response, time.perf_counter() - started)
+        return response
+
+
+class _AsyncCassetteTavily(_CassetteTavily):
+    async def search(self, query, **kwargs):
+        key = _hash([query, kwargs])
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("tavily", key, "tavily:search")
+            await asyncio.sleep(self.cassette.delay(entry))
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = await self.client.search(query=query, **kwargs)
+        self.cassette.record("tavily", key, "tavily:search", response, time.perf_counter() - started)
+        return response
+
+
+# =========================
+# INSTALL
+# =========================
+
+_cassette = None
+
+
+def install_cassette(mode: str = CASSETTE_MODE, path: str = CASSETTE_PATH, time_scale: float = CASSETTE_TIME_SCALE):
+    """
+    Route chat clients and the network tools through a cassette.
+    Must run before modules that build chat clients at import time
+    (router, chat agent) are loaded. Returns None when mode is off.
+    """
+    global _cassette
+    if mode == "off":
+        return None
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from src.llm import set_llm_factory
+    import src.tools as tools
+
+    cassette = Cassette(path, mode, time_scale)
+
+    def factory(model, temperature, **kwargs):
+        inner = ChatGoogleGenerativeAI(model=model, temperature=temperature) if mode == "record" else None
+        return CassetteChatModel(cassette=cassette, inner=inner, model=model, temperature=temperature, **kwargs)
+
+    set_llm_factory(factory)
+
+    get_http_session = tools.get_http_session
+    get_async_http_client = tools.get_async_http_client
+    get_tavily_client = tools.get_tavily_client
+    get_async_tavily_client = tools.get_async_tavily_client
+    recording = mode == "record"
+
+    tools.get_http_session = lambda name="default": _CassetteHTTP(
+        cassette, name, get_http_session(name) if recording else None
+    )
+    tools.get_async_http_client = lambda name="default": _AsyncCassetteHTTP(
+        cassette, name, get_async_http_client(name) if recording else None
+    )
+    tools.get_tavily_client = lambda api_key: _CassetteTavily(
+        cassette, get_tavily_client(api_key) if recording else None
+    )
+    tools.get_async_tavily_client = lambda api_key: _AsyncCassetteTavily(
+        cassette, get_async_tavily_client(api_key) if recording else None
+    )
+    if not recording:
+        # web_search refuses to run without a key, even when replaying
+        os.environ.setdefault("TAVILY_API_KEY", "cassette-replay")
+
+    _cassette = cassette
+    print(f"📼 Cassette {mode}: {path} (time scale {time_scale})")
+    return cassette
+
+
+def cassette_stats() -> dict:
+    if _cassette is None:
+        return {"mode": "off"}
+    return _cassette.stats()
@@ -1,10 +1,7 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from src.llm import get_llm, cache_opt_in
 
-chat_llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7
-)
+chat_llm = get_llm("gemini-2.5-flash", 0.7, cache=cache_opt_in("chat"))
 
 SYSTEM_PROMPT = """
 You are a friendly conversational AI.
@@ -0,0 +1,169 @@
+import math
+import os
+
+# Token-budgeted prompt assembly for the orchestrator.
+# Each prompt has a total budget split across its variable sections
+# (conversation history, shared knowledge, research data) by weight.
+# Sections needing less than their share hand the rest to the others;
+# sections needing more are cut down: history keeps the newest messages,
+# shared knowledge keeps the highest-ranked facts, research data keeps
+# whole paragraphs from the top.
+#
+# Tokens are estimated from characters (CONTEXT_CHARS_PER_TOKEN), which is
+# close enough for budgeting and needs no tokenizer or API round trip.
+
+CONTEXT_CHARS_PER_TOKEN = float(os.getenv("CONTEXT_CHARS_PER_TOKEN", "4"))
+CONTEXT_TOKEN_BUDGETS = {
+    "planner": int(os.getenv("PLANNER_CONTEXT_TOKENS", "1500")),
+    "researcher": int(os.getenv("RESEARCHER_CONTEXT_TOKENS", "2000")),
+    "summarizer": int(os.getenv("SUMMARIZER_CONTEXT_TOKENS", "6000")),
+}
+SECTION_WEIGHTS = {
+    "history": float(os.getenv("CONTEXT_HISTORY_WEIGHT", "0.2")),
+    "shared": float(os.getenv("CONTEXT_SHARED_WEIGHT", "0.3")),
+    "research": float(os.getenv("CONTEXT_RESEARCH_WEIGHT", "0.5")),
+}
+# Most recent history messages considered per agent before budgeting
+HISTORY_MESSAGES = {"planner": 6, "researcher": 4}
+HISTORY_MESSAGE_TOKENS = int(os.getenv("CONTEXT_HISTORY_MESSAGE_TOKENS", "150"))
+PROMPT_TOKEN_LOGGING = os.getenv("PROMPT_TOKEN_LOGGING", "true").lower() in ("1", "true", "yes")
+
+# Headroom for the fixed instruction lines of each prompt template
+TEMPLATE_RESERVE_TOKENS = 40
+
+TRUNCATION_MARK = " …[truncated]"
+ROLE_LABELS = {"human": "User", "ai": "Assistant", "system": "System", "tool": "Tool"}
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CONTEXT_CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    max_chars = int(max_tokens * CONTEXT_CHARS_PER_TOKEN) - len(TRUNCATION_MARK)
+    if max_chars <= 0:
+        return ""
+    return text[:max_chars].rstrip() + TRUNCATION_MARK
+
+
+def format_history(messages: list, max_messages: int = None) -> str:
+    """Compact "Role: text" lines in chronological order, each message capped"""
+    if max_messages is not None:
+        messages = messages[-max_messages:] if max_messages else []
+
+    lines = []
+    for message in messages:
+        role = ROLE_LABELS.get(getattr(message, "type", ""), "Message")
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        lines.append(f"{role}: {truncate_to_tokens(' '.join(content.split()), HISTORY_MESSAGE_TOKENS)}")
+    return "\n".join(lines)
+
+
+def fit_recent_lines(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the bottom (newest history) within the budget"""
+    kept = []
+    used = 0
+    for line in reversed(text.splitlines()):
+        tokens = count_tokens(line) + 1
+        if used + tokens > max_tokens:
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(reversed(kept))
+
+
+def fit_ranked_lines(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the top (most relevant first) within the budget"""
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        tokens = count_tokens(line) + 1
+        if used + tokens > max_tokens:
+            if not kept:
+                kept.append(truncate_to_tokens(line, max_tokens))
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept)
+
+
+def fit_paragraphs(text: str, max_tokens: int) -> str:
+    """Keep whole paragraphs from the top; cut the first one that overflows"""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept = []
+    used = 0
+    for paragraph in text.split("\n\n"):
+        tokens = count_tokens(paragraph) + 1
+        if used + tokens > max_tokens:
+            remaining = max_tokens - used
+            if remaining > 20:
+                kept.append(truncate_to_tokens(paragraph, remaining))
+            break
+        kept.append(paragraph)
+        used += tokens
+    return "\n\n".join(kept) + ("" if kept and kept[-1].endswith(TRUNCATION_MARK) else TRUNCATION_MARK)
+
+
+def allocate(budget: int, needs: dict) -> dict:
+    """
+    Split budget across sections {name: tokens_needed} by SECTION_WEIGHTS.
+    Shares a section does not need are redistributed to the others.
+    """
+    allocation = {name: 0 for name in needs}
+    pending = {name: need for name, need in needs.items() if need > 0}
+    remaining = budget
+
+    while pending and remaining > 0:
+        total_weight = sum(SECTION_WEIGHTS.get(name, 1.0) for name in pending)
+        shares = {
+            name: int(remaining * SECTION_WEIGHTS.get(name, 1.0) / total_weight)
+            for name in pending
+        }
+        satisfied = {name for name, need in pending.items() if need <= shares[name]}
+        if not satisfied:
+            for name in pending:
+                allocation[name] += shares[name]
+            break
+        for name in satisfied:
+            allocation[name] += pending[name]
+            remaining -= pending[name]
+            del pending[name]
+
+    return allocation
+
+
+def fit_sections(call_site: str, fixed: str, sections: dict) -> dict:
+    """
+    Fit {name: (text, fitter)} into the call site's budget minus the fixed
+    prompt text. fitter(text, max_tokens) cuts a section down to size.
+    """
+    budget = CONTEXT_TOKEN_BUDGETS.get(call_site, 4000) - count_tokens(fixed) - TEMPLATE_RESERVE_TOKENS
+    budget = max(0, budget)
+    needs = {name: count_tokens(text) for name, (text, _) in sections.items()}
+    allocation = allocate(budget, needs)
+
+    return {
+        name: text if needs[name] <= allocation[name] else fitter(text, allocation[name])
+        for name, (text, fitter) in sections.items()
+    }
+
+
+def log_prompt_tokens(call_site: str, prompt: str, sections: dict = None):
+    """Print the estimated prompt size of one LLM call"""
+    if not PROMPT_TOKEN_LOGGING:
+        return
+    detail = ""
+    if sections:
+        detail = " (" + ", ".join(
+            f"{name} {count_tokens(text)}" for name, text in sections.items()
+        ) + ")"
+    print(
+        f"🧮 {call_site} prompt: ~{count_tokens(prompt)} tokens"
+        f" / budget {CONTEXT_TOKEN_BUDGETS.get(call_site, '-')}{detail}"
+    )
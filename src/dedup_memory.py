@@ -0,0 +1,20 @@
+import sys
+
+from src.shared_memory import DEFAULT_PERSIST_DIRECTORY, DEDUP_THRESHOLD, SharedKnowledgeBase
+
+# One-off near-duplicate cleanup for an existing shared memory directory:
+#   python -m src.dedup_memory [persist_directory] [threshold]
+
+
+def main():
+    persist_directory = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PERSIST_DIRECTORY
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else DEDUP_THRESHOLD
+
+    kb = SharedKnowledgeBase(persist_directory, write_behind=False)
+    before = kb.warm_up().index_stats()["facts"]
+    removed = kb.deduplicate(threshold)
+    print(f"✅ {persist_directory}: {before} facts, {removed} near-duplicates removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from src.tracing import span
+
+# Bounded LRU in front of the embedding model.
+# Keys are content hashes, so the same text is embedded at most once per
+# process until it is evicted. MiniLM embeds queries and documents the same
+# way, so embed_query and embed_documents share one key space.
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def _key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """LRU-cached wrapper around another Embeddings instance"""
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _get(self, key: str):
+        # Caller holds the lock
+        vector = self._entries.get(key)
+        if vector is None:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return vector
+
+    def _put(self, key: str, vector: list):
+        # Caller holds the lock
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [_key(text) for text in texts]
+
+        with self._lock:
+            vectors = [self._get(key) for key in keys]
+
+        # Embed the misses in one batch (duplicates inside the batch only once)
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+
+        if missing:
+            with span("embed_documents", kind="embedding", texts=len(missing)):
+                computed = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), computed))
+            with self._lock:
+                for key, vector in fresh.items():
+                    self._put(key, vector)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+
+        return [list(vector) for vector in vectors]
+
+    def embed_query(self, text: str) -> list:
+        key = _key(text)
+        with self._lock:
+            vector = self._get(key)
+        if vector is None:
+            with span("embed_query", kind="embedding"):
+                vector = self.embeddings.embed_query(text)
+            with self._lock:
+                self._put(key, vector)
+        return list(vector)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["enabled"] = True
+        return stats
+
+
+def get_embeddings() -> Embeddings:
+    """Return the process-wide MiniLM embedding model (loaded once, LRU-cached)"""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+                _embeddings = CachedEmbeddings(model) if EMBEDDING_CACHE_ENABLED else model
+    return _embeddings
+
+
+def embedding_cache_stats() -> dict:
+    if isinstance(_embeddings, CachedEmbeddings):
+        return _embeddings.stats()
+    return {"enabled": EMBEDDING_CACHE_ENABLED, "loaded": _embeddings is not None}
+
+
+class RequestContext:
+    """
+    Per-request state shared by the workflow stages.
+    The query is embedded on first access to query_vector and the same
+    vector is handed to the semantic cache, the planner fast-path and the
+    shared-memory search.
+    """
+
+    def __init__(self, query: str, embeddings: Embeddings = None):
+        self.query = query
+        self._embeddings = embeddings
+        self._query_vector = None
+        self._lock = threading.Lock()
+
+    @property
+    def query_vector(self) -> list:
+        if self._query_vector is None:
+            with self._lock:
+                if self._query_vector is None:
+                    embeddings = self._embeddings or get_embeddings()
+                    self._query_vector = embeddings.embed_query(self.query)
+        return self._query_vector
@@ -0,0 +1,63 @@
+import os
+import time
+
+# Capacity and age limits for the shared memory.
+# Every fact carries created_at, refreshed_at (near-duplicate re-saves),
+# last_retrieved_at and hits in its metadata. Once the live fact count
+# exceeds SHARED_MEMORY_MAX_FACTS, facts are evicted in one batch down to
+# (1 - SHARED_MEMORY_EVICTION_BATCH) of the limit:
+#   lru - least recently used (created, refreshed or retrieved)
+#   lfu - fewest hits, ties broken by least recently used; facts created or
+#         refreshed within SHARED_MEMORY_LFU_GRACE seconds go last, so a new
+#         fact is not evicted before it has had a chance to be retrieved
+#   ttl - oldest created/refreshed first
+# Independently, SHARED_MEMORY_FACT_TTL > 0 expires facts not created or
+# refreshed within that many seconds.
+
+EVICTION_POLICIES = ("lru", "lfu", "ttl")
+EVICTION_POLICY = os.getenv("SHARED_MEMORY_EVICTION_POLICY", "lru").lower()
+MAX_FACTS = int(os.getenv("SHARED_MEMORY_MAX_FACTS", "0"))  # 0 = unbounded
+EVICTION_BATCH = float(os.getenv("SHARED_MEMORY_EVICTION_BATCH", "0.05"))
+FACT_TTL = float(os.getenv("SHARED_MEMORY_FACT_TTL", "0"))  # seconds, 0 = no expiry
+TTL_SWEEP_INTERVAL = float(os.getenv("SHARED_MEMORY_TTL_SWEEP_INTERVAL", "60"))
+LFU_GRACE = float(os.getenv("SHARED_MEMORY_LFU_GRACE", "600"))  # seconds
+
+
+def freshness(metadata: dict) -> float:
+    return max(metadata.get("created_at", 0.0), metadata.get("refreshed_at", 0.0))
+
+
+def last_used(metadata: dict) -> float:
+    return max(freshness(metadata), metadata.get("last_retrieved_at", 0.0))
+
+
+def eviction_key(metadata: dict, policy: str, now: float = None):
+    """Sort key: facts with the smallest key are evicted first"""
+    if policy == "lfu":
+        in_grace = (now or time.time()) - freshness(metadata) < LFU_GRACE
+        return (in_grace, metadata.get("hits", 0), last_used(metadata))
+    if policy == "ttl":
+        return freshness(metadata)
+    return last_used(metadata)
+
+
+def expired_ids(items, ttl_seconds: float, now: float = None) -> list:
+    """Ids from (id, metadata) pairs not created or refreshed within ttl_seconds"""
+    if not ttl_seconds:
+        return []
+    cutoff = (now or time.time()) - ttl_seconds
+    return [doc_id for doc_id, metadata in items if freshness(metadata) < cutoff]
+
+
+def select_victims(items, max_facts: int, policy: str, batch: float = EVICTION_BATCH) -> list:
+    """Ids to evict from (id, metadata) pairs so at most max_facts remain"""
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown eviction policy: {policy}")
+    items = list(items)
+    if not max_facts or len(items) <= max_facts:
+        return []
+
+    target = max(0, int(max_facts * (1 - batch)))
+    now = time.time()
+    ranked = sorted(items, key=lambda item: eviction_key(item[1], policy, now))
+    return [doc_id for doc_id, _ in ranked[:len(items) - target]]
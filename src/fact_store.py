@@ -0,0 +1,317 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+# Incremental on-disk format for the shared FAISS memory.
+#
+# <dir>/MANIFEST.json          {"generation": g, "dim": d, "count": n}
+# <dir>/base-<g>.npy           float32 [n, d] snapshot vectors (memory-mapped on load)
+# <dir>/base-<g>.jsonl         one fact record per line, same order as the vectors
+# <dir>/segment-<g>.log        append-only log of operations since the snapshot
+#
+# Each log frame is: <json_len:u32><vector_len:u32><crc32:u32> json vector-bytes.
+# A torn frame at the tail (crash mid-append) fails the length/CRC check and is
+# truncated on load. Compaction writes generation g+1 and switches MANIFEST.json
+# with an atomic rename, so a crash during compaction leaves generation g intact.
+
+FRAME_HEADER = struct.Struct("<III")
+MANIFEST = "MANIFEST.json"
+
+COMPACT_THRESHOLD = int(os.getenv("SHARED_MEMORY_COMPACT_THRESHOLD", "500"))
+FSYNC_ENABLED = os.getenv("SHARED_MEMORY_FSYNC", "true").lower() in ("1", "true", "yes")
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SegmentLogStore:
+    """Base snapshot + append-only segment log for fact records and vectors"""
+
+    def __init__(
+        self,
+        directory: str,
+        compact_threshold: int = COMPACT_THRESHOLD,
+        fsync: bool = FSYNC_ENABLED
+    ):
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+
+        self.generation = 0
+        self.dim = None
+        self.log_entries = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._read_manifest()
+
+    # -------- PATHS -------- #
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _vectors_path(self, generation: int) -> str:
+        return self._path(f"base-{generation}.npy")
+
+    def _records_path(self, generation: int) -> str:
+        return self._path(f"base-{generation}.jsonl")
+
+    def _log_path(self, generation: int) -> str:
+        return self._path(f"segment-{generation}.log")
+
+    def exists(self) -> bool:
+        return os.path.exists(self._path(MANIFEST))
+
+    def _read_manifest(self):
+        if not self.exists():
+            return
+        with open(self._path(MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.generation = manifest["generation"]
+        self.dim = manifest.get("dim")
+
+    def _write_manifest(self, generation: int, dim: int, count: int):
+        tmp = self._path(MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "dim": dim, "count": count}, f)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self._path(MANIFEST))
+        if self.fsync:
+            _fsync_dir(self.directory)
+
+    # -------- LOG FRAMES -------- #
+
+    @staticmethod
+    def _encode(entry: dict, vector=None) -> bytes:
+        body = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        vec = b"" if vector is None else np.asarray(vector, dtype=np.float32).tobytes()
+        return FRAME_HEADER.pack(len(body), len(vec), zlib.crc32(body + vec)) + body + vec
+
+    def _read_log(self, generation: int) -> list:
+        """Return [(entry, vector)] from the log, truncating any torn tail"""
+        path = self._log_path(generation)
+        if not os.path.exists(path):
+            return []
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        entries = []
+        offset = 0
+        while offset + FRAME_HEADER.size <= len(data):
+            json_len, vec_len, crc = FRAME_HEADER.unpack_from(data, offset)
+            start = offset + FRAME_HEADER.size
+            end = start + json_len + vec_len
+            if end > len(data) or zlib.crc32(data[start:end]) != crc:
+                break
+
+            entry = json.loads(data[start:start + json_len].decode("utf-8"))
+            vector = (
+                np.frombuffer(data[start + json_len:end], dtype=np.float32)
+                if vec_len else None
+            )
+            entries.append((entry, vector))
+            offset = end
+
+        if offset < len(data):
+            print(f"⚠️ Truncating {len(data) - offset} torn bytes from {path}")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+        return entries
+
+    # -------- STATE -------- #
+
+    def _read_base(self):
+        """Base snapshot as (records, memory-mapped vectors), parsed in bulk"""
+        records_path = self._records_path(self.generation)
+        if not os.path.exists(records_path):
+            return [], None
+
+        with open(records_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        # One json.loads over the whole file instead of one per record
+        records = json.loads("[" + ",".join(line for line in lines if line) + "]")
+        vectors = np.load(self._vectors_path(self.generation), mmap_mode="r")
+        return records, vectors
+
+    def _read_delta(self, records: list, blocks: list):
+        """
+        Apply the segment log on top of the base records (caller holds the lock).
+        Added records and their vectors are appended, touches update metadata
+        in place and deleted ids are returned instead of being removed, so the
+        base rows never have to be copied. Returns the set of deleted ids.
+        """
+        log = self._read_log(self.generation)
+        self.log_entries = len(log)
+
+        positions = None
+        added = []
+        deleted = set()
+        for entry, vector in log:
+            op = entry.get("op", "add")
+            if op == "add":
+                records.append(entry["record"])
+                added.append(vector)
+                if positions is not None:
+                    positions[entry["id"]] = len(records) - 1
+                continue
+
+            if positions is None:
+                positions = {record["id"]: i for i, record in enumerate(records)}
+            if entry["id"] not in positions or entry["id"] in deleted:
+                continue
+            if op == "touch":
+                records[positions[entry["id"]]]["metadata"].update(entry["metadata"])
+            elif op == "delete":
+                deleted.add(entry["id"])
+
+        if added:
+            blocks.append(np.vstack(added).astype(np.float32, copy=False))
+        return deleted
+
+    def _read_blocks(self):
+        """(records, [vector blocks in record order], deleted ids); caller holds the lock"""
+        records, base_vectors = self._read_base()
+        blocks = [base_vectors] if base_vectors is not None and len(base_vectors) else []
+        deleted = self._read_delta(records, blocks)
+        return records, blocks, deleted
+
+    def _read_state(self):
+        """Replay base snapshot + log into (records, vectors) without deleted records"""
+        records, blocks, deleted = self._read_blocks()
+        if not records:
+            return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        vectors = np.concatenate(blocks) if len(blocks) > 1 else np.asarray(blocks[0])
+        if deleted:
+            keep = [i for i, record in enumerate(records) if record["id"] not in deleted]
+            records = [records[i] for i in keep]
+            vectors = vectors[keep]
+        return records, np.asarray(vectors, dtype=np.float32)
+
+    def load(self):
+        """Return (records, vectors [n, dim]) for the current generation"""
+        with self._lock:
+            return self._read_state()
+
+    def load_blocks(self):
+        """
+        Fast startup load: (records, vector blocks, deleted ids).
+        The base snapshot block is the memory-mapped .npy itself; only the
+        segment log is replayed. Deleted records are still included and
+        their ids returned, so the caller can treat them as tombstones.
+        """
+        with self._lock:
+            return self._read_blocks()
+
+    # -------- WRITES -------- #
+
+    def _write_frames(self, frames: bytes):
+        # Caller holds the lock
+        with open(self._log_path(self.generation), "ab") as f:
+            f.write(frames)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def append(self, records: list, vectors):
+        """Durably append new fact records with their vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_manifest(self.generation, self.dim, 0)
+
+            self._write_frames(b"".join(
+                self._encode({"op": "add", "id": record["id"], "record": record}, vector)
+                for record, vector in zip(records, vectors)
+            ))
+            self.log_entries += len(records)
+
+    def touch(self, updates: dict):
+        """Durably merge {id: metadata} into existing records"""
+        with self._lock:
+            self._write_frames(b"".join(
+                self._encode({"op": "touch", "id": record_id, "metadata": metadata})
+                for record_id, metadata in updates.items()
+            ))
+            self.log_entries += len(updates)
+
+    def delete(self, record_ids: list):
+        """Durably tombstone records; they are dropped at the next compaction"""
+        with self._lock:
+            self._write_frames(b"".join(
+                self._encode({"op": "delete", "id": record_id}) for record_id in record_ids
+            ))
+            self.log_entries += len(record_ids)
+
+    def needs_compaction(self) -> bool:
+        return self.log_entries >= self.compact_threshold
+
+    def _write_generation(self, records: list, vectors):
+        """Write records/vectors as generation + 1 and switch to it (caller holds the lock)"""
+        old_generation = self.generation
+        generation = old_generation + 1
+
+        vectors_tmp = self._vectors_path(generation) + ".tmp"
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(vectors_tmp, self._vectors_path(generation))
+
+        records_tmp = self._records_path(generation) + ".tmp"
+        with open(records_tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(records_tmp, self._records_path(generation))
+
+        open(self._log_path(generation), "wb").close()
+
+        # Switching the manifest is the commit point
+        self._write_manifest(generation, self.dim, len(records))
+        self.generation = generation
+        self.log_entries = 0
+
+        for path in (
+            self._vectors_path(old_generation),
+            self._records_path(old_generation),
+            self._log_path(old_generation),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def compact(self):
+        """Fold the log into a new base snapshot (generation + 1)"""
+        with self._lock:
+            records, vectors = self._read_state()
+            self._write_generation(records, vectors)
+
+    def write_snapshot(self, records: list, vectors):
+        """Replace all contents with a fresh snapshot (migration, dedup)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self.dim = int(vectors.shape[1])
+            self._write_generation(records, vectors)
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Deterministic stand-in for ChatGoogleGenerativeAI, used by the offline
+# benchmark. It recognises the calling agent from its system prompt and
+# answers with a fixed script after a configurable delay:
+# - planner:    a plan naming research_tools (or "No research required")
+# - researcher: one turn of parallel tool calls, then raw findings
+# - summarizer / email agent: a short answer
+# - router:     {"mode": "COMPLEX_TASK"}
+
+# Arguments the researcher script passes to each tool ({query} is filled in)
+DEFAULT_TOOL_ARGS = {
+    "web_search": {"query": "{query}"},
+    "get_weather": {"city": "Paris"},
+    "calculate": {"expression": "12*(3+4) - sqrt(16)"},
+    "extract_keywords": {"text": "{query}"},
+    "search_shared_memory": {"query": "{query}", "memory_context": ""},
+}
+
+
+def _fill(args: dict, query: str) -> dict:
+    return {
+        key: value.format(query=query) if isinstance(value, str) else value
+        for key, value in args.items()
+    }
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Fake chat model with configurable latency and tool-call scripts"""
+
+    latency: float = 0.05
+    jitter: float = 0.0
+    research_tools: List[str] = ["web_search"]
+    tool_args: dict = DEFAULT_TOOL_ARGS
+    model: str = "scripted-fake"
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool calls come from the script, so binding is a no-op
+        return self
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        # Agents are told apart by the opening line; prompts mention each other later on
+        role = system.strip().splitlines()[0] if system.strip() else ""
+        last = messages[-1]
+        query = str(last.content)[-200:]
+
+        if "Planner Agent" in role:
+            if not self.research_tools:
+                return AIMessage("No research required. Generate the answer directly.")
+            return AIMessage(
+                f"1. Use {', '.join(self.research_tools)} to collect facts for the request.\n"
+                "2. Summarize the findings for the user."
+            )
+
+        if "Research Agent" in role:
+            if isinstance(last, ToolMessage):
+                findings = [str(m.content)[:200] for m in messages if isinstance(m, ToolMessage)]
+                return AIMessage("Raw findings:\n" + "\n".join(findings))
+            tool_calls = [
+                {"name": name, "args": _fill(self.tool_args.get(name, {}), query), "id": f"call_{i}"}
+                for i, name in enumerate(self.research_tools)
+            ]
+            return AIMessage("", tool_calls=tool_calls)
+
+        if "Summarizer Agent" in role:
+            return AIMessage("Summary: the collected findings answer the request.")
+
+        if "Email Compose Agent" in role:
+            return AIMessage("Subject: Update\n\nHi team,\n\nHere is the summary you asked for.\n\nBest regards")
+
+        if "JSON Response Format" in str(last.content):
+            return AIMessage('{"mode": "COMPLEX_TASK"}')
+
+        return AIMessage("Hello! How can I help?")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Keep-alive HTTP connection pools shared by the network tools.
+# One pool per upstream name, so per-service headers (API keys) never leak
+# into requests to another host. Sync tools use requests sessions with
+# retry/backoff; the async path uses httpx clients (one per event loop),
+# whose transport retries failed connects. Per-loop objects are held by
+# LoopLocal, keyed weakly on the loop itself, so they go away with it.
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+
+class LoopLocal:
+    """
+    Objects bound to one asyncio event loop (clients, semaphores), keyed
+    weakly on the loop. Entries of closed loops are dropped whenever a new
+    loop registers, and entries of garbage-collected loops vanish on their
+    own, so a reused loop id can never be handed a stale object.
+    """
+
+    def __init__(self):
+        self._loops = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory, is_valid=None):
+        """Value for key on the running loop, built with factory() when missing or invalid"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            values = self._loops.get(loop)
+            if values is None:
+                self._prune()
+                values = self._loops[loop] = {}
+            value = values.get(key)
+            if value is None or (is_valid is not None and not is_valid(value)):
+                value = values[key] = factory()
+        return value
+
+    def pop(self, loop) -> dict:
+        """Remove and return every value registered for loop"""
+        with self._lock:
+            return self._loops.pop(loop, {})
+
+    def _prune(self):
+        # Caller holds the lock
+        for loop in [loop for loop in self._loops if loop.is_closed()]:
+            del self._loops[loop]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._loops)
+
+
+_sessions = {}
+_async_clients = LoopLocal()
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session(name: str = "default") -> requests.Session:
+    """Process-wide pooled requests session for one upstream service"""
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _build_session()
+                _sessions[name] = session
+    return session
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_SIZE,
+            max_keepalive_connections=HTTP_POOL_SIZE
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES)
+    )
+
+
+def get_async_http_client(name: str = "default") -> httpx.AsyncClient:
+    """Pooled httpx client for one upstream service on the running event loop"""
+    return _async_clients.get(name, _build_async_client, is_valid=lambda client: not client.is_closed)
+
+
+def close_http_pools():
+    """Close every pooled session (sync ones immediately)"""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+async def aclose_http_pools():
+    """Close the async clients of the running loop, then the sync sessions"""
+    clients = _async_clients.pop(asyncio.get_running_loop())
+    for client in clients.values():
+        await client.aclose()
+    close_http_pools()
@@ -0,0 +1,63 @@
+from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_cache import get_llm_cache
+import os
+import threading
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Persistent exact-match LLM cache (see src/llm_cache.py).
+# Call sites opt in by name; temperature-0 callers benefit the most.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_CALL_SITES = {
+    site.strip()
+    for site in os.getenv("LLM_CACHE_CALL_SITES", "router,planner").split(",")
+    if site.strip()
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Builds chat clients as factory(model=..., temperature=..., **kwargs);
+# None means Gemini. Swapped by the offline benchmark (src/benchmark.py).
+_llm_factory = None
+
+
+def cache_opt_in(call_site: str) -> bool:
+    """Whether a call site (router, planner, researcher, ...) uses the LLM cache"""
+    return LLM_CACHE_ENABLED and call_site in LLM_CACHE_CALL_SITES
+
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0.0, cache: bool = False):
+    """Return the process-wide chat client for (model, temperature, cache)"""
+    key = (model, float(temperature), bool(cache))
+
+    with _clients_lock:
+        llm = _clients.get(key)
+        if llm is None:
+            kwargs = {}
+            if cache:
+                kwargs["cache"] = get_llm_cache()
+
+            factory = _llm_factory or ChatGoogleGenerativeAI
+            llm = factory(model=model, temperature=temperature, **kwargs)
+            _clients[key] = llm
+
+    return llm
+
+
+def set_llm_factory(factory=None):
+    """
+    Build chat clients with factory instead of ChatGoogleGenerativeAI
+    (None restores Gemini). Clients built so far are dropped; call this
+    before modules that create clients at import time are loaded.
+    """
+    global _llm_factory
+    with _clients_lock:
+        _llm_factory = factory
+        _clients.clear()
+
+
+def llm_client_count() -> int:
+    """Number of distinct chat clients built so far"""
+    with _clients_lock:
+        return len(_clients)
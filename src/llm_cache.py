@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+# Disk-backed exact-match cache for chat model calls.
+# LangChain passes the serialized message list as `prompt` and the model
+# parameters (model name, temperature, bound tool schemas, ...) as
+# `llm_string`, so the key covers everything that changes the answer.
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "0"))  # seconds, 0 = no expiry
+
+# Header a client can send to skip the cache for one request
+LLM_CACHE_BYPASS_HEADER = "X-LLM-Cache"
+
+_bypass = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def llm_cache_bypass(enabled: bool = True):
+    """Skip cache reads and writes for LLM calls made inside this block"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        try:
+            _bypass.reset(token)
+        except ValueError:
+            # Async generators can be closed from a different context
+            pass
+
+
+def is_bypass_requested(header_value: str) -> bool:
+    return (header_value or "").strip().lower() in ("bypass", "no-cache", "off")
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    SQLite-backed LLM cache with LRU eviction past max_entries
+    and optional TTL expiry.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_accessed ON llm_cache (last_accessed)"
+        )
+        self._conn.commit()
+
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "bypassed": 0}
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        if _bypass.get():
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+
+        try:
+            return loads(row[0])
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        if _bypass.get():
+            return
+
+        key = self._key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Caller holds the lock
+        if self.ttl_seconds:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._stats["evictions"] += cursor.rowcount
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._stats["evictions"] += overflow
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            (stats["entries"],) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> SQLiteLLMCache:
+    """Process-wide cache instance, opened on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLiteLLMCache()
+    return _cache
@@ -1,4 +1,10 @@
 import time
+import uuid
+from src.cassette import install_cassette
+
+# CASSETTE_MODE=record|replay: must wrap the LLM clients before they are built
+install_cassette()
+
 from router.input_router import route_input
 from router.state import state
 from chat.chat_agent import chat_response
@@ -26,6 +32,7 @@ def main():
             if user_input.lower() == "clear":
                 state.chat_history.clear()
                 state.pending_task = None
+                state.session_id = str(uuid.uuid4())
                 print("\n🧹 Session state cleared!")
                 continue
 
@@ -76,7 +83,8 @@ def main():
 
                 output = run_task(
                     merged_query,
-                    new_decision["mode"]
+                    new_decision["mode"],
+                    state.session_id
                 )
 
                 elapsed = time.time() - start_time
@@ -91,7 +99,8 @@ def main():
             print("\n🤖 Processing...")
             output = run_task(
                 user_input,
-                decision["mode"]
+                decision["mode"],
+                state.session_id
             )
 
             # If agent asks a follow-up question, pause workflow
@@ -1,27 +1,291 @@
 from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.messages import message_to_dict, messages_from_dict
+from collections import OrderedDict
 from typing import Dict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Session-scoped agent memory.
+# Each session keeps one bounded history per agent (a ring buffer of the
+# last SESSION_MAX_MESSAGES messages) and writes every message through to
+# SQLite, so "Previous conversations" survive across turns and restarts.
+# Sessions idle for SESSION_IDLE_TTL seconds are dropped from RAM (and at
+# most SESSION_MAX_ACTIVE are kept); sessions idle for SESSION_RETENTION
+# seconds are deleted from disk.
+
+SESSION_MEMORY_PATH = os.getenv("SESSION_MEMORY_PATH", "./session_memory.sqlite")
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_RETENTION = float(os.getenv("SESSION_RETENTION", str(7 * 24 * 3600)))
+SESSION_SWEEP_INTERVAL = 60.0
+
+
+class BoundedChatHistory(ChatMessageHistory):
+    """Chat history that only keeps the last max_messages messages"""
+
+    max_messages: int = SESSION_MAX_MESSAGES
+
+    def add_message(self, message):
+        super().add_message(message)
+        overflow = len(self.messages) - self.max_messages
+        if overflow > 0:
+            del self.messages[:overflow]
+
+
+class SessionMemoryStore:
+    """SQLite persistence for per-session, per-agent message ring buffers"""
+
+    def __init__(self, path: str = SESSION_MEMORY_PATH, max_messages: int = SESSION_MAX_MESSAGES):
+        self.path = path
+        self.max_messages = max_messages
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " agent_id TEXT NOT NULL,"
+            " message TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS agent_messages_session"
+            " ON agent_messages (session_id, agent_id, id)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " last_active REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str) -> dict:
+        """Return {agent_id: [messages]} for a session"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT agent_id, message FROM agent_messages"
+                " WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+
+        histories = {}
+        for agent_id, message in rows:
+            histories.setdefault(agent_id, []).append(json.loads(message))
+        return {agent_id: messages_from_dict(messages) for agent_id, messages in histories.items()}
+
+    def append(self, session_id: str, agent_id: str, message):
+        """Persist one message and trim the agent's history to the ring size"""
+        self.append_many(session_id, [(agent_id, message)])
+
+    def append_many(self, session_id: str, messages: list):
+        """Persist [(agent_id, message)] and trim each history in one transaction"""
+        if not messages:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO agent_messages (session_id, agent_id, message) VALUES (?, ?, ?)",
+                [
+                    (session_id, agent_id, json.dumps(message_to_dict(message)))
+                    for agent_id, message in messages
+                ]
+            )
+            for agent_id in dict.fromkeys(agent_id for agent_id, _ in messages):
+                self._conn.execute(
+                    "DELETE FROM agent_messages WHERE session_id = ? AND agent_id = ? AND id NOT IN ("
+                    " SELECT id FROM agent_messages WHERE session_id = ? AND agent_id = ?"
+                    " ORDER BY id DESC LIMIT ?)",
+                    (session_id, agent_id, session_id, agent_id, self.max_messages)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, last_active) VALUES (?, ?)",
+                (session_id, now)
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM agent_messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def expire(self, retention_seconds: float = SESSION_RETENTION) -> int:
+        """Delete sessions idle for longer than retention_seconds"""
+        cutoff = time.time() - retention_seconds
+        with self._lock:
+            expired = [
+                row[0] for row in self._conn.execute(
+                    "SELECT session_id FROM sessions WHERE last_active < ?", (cutoff,)
+                ).fetchall()
+            ]
+            for session_id in expired:
+                self._conn.execute("DELETE FROM agent_messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,))
+            self._conn.commit()
+        return len(expired)
+
+    def session_count(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return count
+
 
 class AgentMemory:
-    def __init__(self):
-        self.agent_memories: Dict[str, ChatMessageHistory] = {}
-    
-    def get_agent_memory(self, agent_id: str) -> ChatMessageHistory:
+    def __init__(
+        self,
+        session_id: str = None,
+        store: SessionMemoryStore = None,
+        max_messages: int = SESSION_MAX_MESSAGES
+    ):
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self._store = store
+        self._lock = threading.Lock()
+        self.last_active = time.time()
+        self.agent_memories: Dict[str, BoundedChatHistory] = {}
+
+        if store is not None and session_id is not None:
+            for agent_id, messages in store.load(session_id).items():
+                history = BoundedChatHistory(max_messages=max_messages)
+                for message in messages:
+                    history.add_message(message)
+                self.agent_memories[agent_id] = history
+
+    def get_agent_memory(self, agent_id: str) -> BoundedChatHistory:
         """Get conversation history for specific agent"""
-        if agent_id not in self.agent_memories:
-            self.agent_memories[agent_id] = ChatMessageHistory()
-        return self.agent_memories[agent_id]
-    
+        with self._lock:
+            if agent_id not in self.agent_memories:
+                self.agent_memories[agent_id] = BoundedChatHistory(max_messages=self.max_messages)
+            return self.agent_memories[agent_id]
+
     def add_message(self, agent_id: str, role: str, content: str):
         """Add message to agent's memory"""
-        history = self.get_agent_memory(agent_id)
-        if role.lower() == "user":
-            history.add_user_message(content)
-        elif role.lower() == "assistant":
-            history.add_ai_message(content)
-        else:
-            history.add_message({"role": role, "content": content})
-    
+        self.add_messages([(agent_id, role, content)])
+
+    def add_messages(self, messages: list):
+        """Add [(agent_id, role, content)] and persist them in one transaction"""
+        added = []
+        for agent_id, role, content in messages:
+            history = self.get_agent_memory(agent_id)
+            if role.lower() == "user":
+                history.add_user_message(content)
+            elif role.lower() == "assistant":
+                history.add_ai_message(content)
+            else:
+                history.add_message({"role": role, "content": content})
+            added.append((agent_id, history.messages[-1]))
+
+        self.last_active = time.time()
+        if self._store is not None and self.session_id is not None:
+            self._store.append_many(self.session_id, added)
+
     def get_context(self, agent_id: str, max_messages: int = 10) -> list:
         """Get recent conversation context for agent"""
         history = self.get_agent_memory(agent_id)
-        return history.messages[-max_messages:] if len(history.messages) > max_messages else history.messages
\ No newline at end of file
+        return history.messages[-max_messages:] if len(history.messages) > max_messages else history.messages
+
+
+class SessionMemoryRegistry:
+    """
+    Process-wide AgentMemory per session id, loaded from the store on first
+    use and dropped again once idle (LRU-bounded to max_active sessions).
+    """
+
+    def __init__(
+        self,
+        max_active: int = SESSION_MAX_ACTIVE,
+        idle_ttl: float = SESSION_IDLE_TTL,
+        retention: float = SESSION_RETENTION
+    ):
+        self.max_active = max_active
+        self.idle_ttl = idle_ttl
+        self.retention = retention
+        self._store = None
+        self._store_lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._stats = {"loads": 0, "reuses": 0, "expired": 0, "evicted": 0}
+
+    @property
+    def store(self) -> SessionMemoryStore:
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = SessionMemoryStore()
+        return self._store
+
+    def get(self, session_id: str) -> AgentMemory:
+        now = time.time()
+        with self._lock:
+            expire = self._sweep(now)
+            memory = self._reuse(session_id, now)
+
+        # Disk I/O happens outside the registry lock, so lookups of other
+        # sessions never wait behind it
+        if expire:
+            self.store.expire(self.retention)
+        if memory is not None:
+            return memory
+
+        loaded = AgentMemory(session_id, store=self.store)
+
+        with self._lock:
+            # Another request may have loaded the same session meanwhile
+            memory = self._reuse(session_id, now)
+            if memory is not None:
+                return memory
+
+            self._sessions[session_id] = loaded
+            self._stats["loads"] += 1
+            while len(self._sessions) > self.max_active:
+                self._sessions.popitem(last=False)
+                self._stats["evicted"] += 1
+            return loaded
+
+    def _reuse(self, session_id: str, now: float):
+        # Caller holds the lock
+        memory = self._sessions.get(session_id)
+        if memory is not None:
+            self._sessions.move_to_end(session_id)
+            self._stats["reuses"] += 1
+            memory.last_active = now
+        return memory
+
+    def _sweep(self, now: float) -> bool:
+        """Drop idle sessions from RAM; returns whether the disk retention sweep is due"""
+        # Caller holds the lock
+        if now - self._last_sweep < SESSION_SWEEP_INTERVAL:
+            return False
+        self._last_sweep = now
+
+        idle = [
+            session_id for session_id, memory in self._sessions.items()
+            if now - memory.last_active > self.idle_ttl
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+        self._stats["expired"] += len(idle)
+
+        return bool(self.retention)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = len(self._sessions)
+        return stats
+
+
+session_memory = SessionMemoryRegistry()
+
+
+def get_session_memory(session_id: str = None) -> AgentMemory:
+    """AgentMemory for a caller-supplied session; a throwaway one without it"""
+    if not session_id:
+        return AgentMemory()
+    return session_memory.get(session_id)
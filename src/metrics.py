@@ -0,0 +1,163 @@
+import bisect
+import os
+import threading
+
+# Prometheus-style latency histograms and counters, rendered in the text
+# exposition format on /metrics. Values come from finished tracing spans
+# (see src/tracing.py), so the router, agent stages, tools, embeddings and
+# FAISS search/save are measured at the same points they are traced.
+# Agent stage timings are held back until their workflow finishes and are
+# then labelled with that request's research_skipped / email_intent outcome.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Seconds; the tail buckets cover slow LLM turns and tool loops
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+WORKFLOW_LABELS = ("research_skipped", "email_intent", "cache_hit")
+
+
+def _label_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, le: str = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(_label_value(labels.get(name)) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(_label_value(labels.get(name)) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._series[key] = series
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bound)} {cumulative}")
+            cumulative += values[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, '+Inf')} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+workflow_seconds = Histogram(
+    "agent_workflow_seconds", "End-to-end multi-agent workflow latency", WORKFLOW_LABELS
+)
+workflow_requests = Counter(
+    "agent_workflow_requests_total", "Multi-agent workflow runs", WORKFLOW_LABELS + ("status",)
+)
+stage_seconds = Histogram(
+    "agent_stage_seconds", "Latency of one agent invoke per workflow stage",
+    ("stage", "research_skipped", "email_intent")
+)
+router_seconds = Histogram("router_seconds", "Routing decision latency", ("step",))
+tool_seconds = Histogram("tool_call_seconds", "Tool call latency", ("tool",))
+tool_calls = Counter("tool_calls_total", "Tool calls", ("tool", "status"))
+embedding_seconds = Histogram(
+    "embedding_seconds", "Embedding model latency (cache misses only)", ("operation",)
+)
+faiss_seconds = Histogram("faiss_seconds", "Shared-memory FAISS search/save latency", ("operation",))
+
+REGISTRY = (
+    workflow_seconds, workflow_requests, stage_seconds, router_seconds,
+    tool_seconds, tool_calls, embedding_seconds, faiss_seconds,
+)
+
+
+def _observe_stage(span, root):
+    stage_seconds.observe(
+        span.duration,
+        stage=span.name,
+        research_skipped=root.attrs.get("research_skipped"),
+        email_intent=root.attrs.get("email_intent")
+    )
+
+
+def observe_span(span):
+    """Turn a finished tracing span into metric observations"""
+    kind = span.kind
+
+    if kind == "tool":
+        tool_seconds.observe(span.duration, tool=span.name)
+        tool_calls.inc(tool=span.name, status=span.status)
+    elif kind == "agent":
+        root = span.root
+        if root.kind == "workflow" and root.duration is None:
+            # Labelled once the workflow knows whether research/email ran
+            root.deferred.append(span)
+        else:
+            _observe_stage(span, root)
+    elif kind == "workflow":
+        labels = {name: span.attrs.get(name) for name in WORKFLOW_LABELS}
+        workflow_seconds.observe(span.duration, **labels)
+        workflow_requests.inc(status=span.status, **labels)
+        for stage in span.deferred:
+            _observe_stage(stage, span)
+    elif kind == "router":
+        router_seconds.observe(span.duration, step=span.name)
+    elif kind == "embedding":
+        embedding_seconds.observe(span.duration, operation=span.name)
+    elif kind == "faiss":
+        faiss_seconds.observe(span.duration, operation=span.name)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
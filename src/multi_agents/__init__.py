@@ -1,4 +1,6 @@
 from .planner_agent import create_planner_agent
-from .research_agent import create_research_agent
+from .research_agent import create_research_agent, research_run_config
 from .summarizer_agent import create_summarizer_agent
-from .email_compose_agent import create_email_compose_agent
\ No newline at end of file
+from .email_compose_agent import create_email_compose_agent
+from .registry import AgentRegistry, agent_registry
+from .tool_selection import select_research_tools, tool_selection_stats
@@ -1,4 +1,4 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm import get_llm, cache_opt_in
 from langchain.agents import create_agent
 
 
@@ -6,10 +6,7 @@ def create_email_compose_agent(
     model: str = "gemini-2.5-flash",
     temperature: float = 0.3
 ):
-    llm = ChatGoogleGenerativeAI(
-        model=model,
-        temperature=temperature
-    )
+    llm = get_llm(model, temperature, cache=cache_opt_in("email"))
 
     system_prompt = (
         "You are the Email Compose Agent in a multi-agent orchestration system.\n\n"
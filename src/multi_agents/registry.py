@@ -0,0 +1,98 @@
+import threading
+
+from src.llm import DEFAULT_MODEL, llm_client_count
+from .planner_agent import create_planner_agent
+from .research_agent import create_research_agent
+from .summarizer_agent import create_summarizer_agent
+from .email_compose_agent import create_email_compose_agent
+
+
+AGENT_FACTORIES = {
+    "planner": create_planner_agent,
+    "researcher": create_research_agent,
+    "summarizer": create_summarizer_agent,
+    "email": create_email_compose_agent,
+}
+
+
+def _tools_key(tools):
+    if tools is None:
+        return None
+    return tuple(sorted(t.name for t in tools))
+
+
+class AgentRegistry:
+    """
+    Process-wide cache of compiled agents.
+    Agents are built lazily on first use, once per
+    (name, model, temperature, tools) key, and shared across requests.
+    """
+
+    def __init__(self, factories: dict = None):
+        self.factories = factories or AGENT_FACTORIES
+        self._agents = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self.builds = 0
+        self.reuses = 0
+
+    def get(
+        self,
+        name: str,
+        model: str = DEFAULT_MODEL,
+        temperature: float = None,
+        tools: list = None
+    ):
+        """Return a compiled agent, building it on first request"""
+        if name not in self.factories:
+            raise ValueError(f"Unknown agent: {name}")
+
+        key = (name, model, temperature, _tools_key(tools))
+
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self.reuses += 1
+                return agent
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Only one thread builds a given key; others wait and then reuse it
+        with build_lock:
+            with self._lock:
+                agent = self._agents.get(key)
+                if agent is not None:
+                    self.reuses += 1
+                    return agent
+
+            kwargs = {"model": model}
+            if temperature is not None:
+                kwargs["temperature"] = temperature
+            if tools is not None:
+                kwargs["tools"] = tools
+
+            agent = self.factories[name](**kwargs)
+
+            with self._lock:
+                self._agents[key] = agent
+                self.builds += 1
+
+        return agent
+
+    def stats(self) -> dict:
+        """Build/reuse counters for monitoring"""
+        with self._lock:
+            return {
+                "builds": self.builds,
+                "reuses": self.reuses,
+                "cached_agents": len(self._agents),
+                "llm_clients": llm_client_count(),
+            }
+
+    def clear(self):
+        """Drop all cached agents (e.g. after a config change)"""
+        with self._lock:
+            self._agents.clear()
+            self._build_locks.clear()
+
+
+agent_registry = AgentRegistry()
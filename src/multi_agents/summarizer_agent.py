@@ -1,4 +1,4 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm import get_llm, cache_opt_in
 from langchain.agents import create_agent
 from src.tools import structure_as_json, generate_markdown_table
 
@@ -6,7 +6,7 @@ def create_summarizer_agent(
     model: str = "gemini-2.5-flash",
     temperature: float = 0.2
 ):
-    llm = ChatGoogleGenerativeAI(model=model, temperature=temperature)
+    llm = get_llm(model, temperature, cache=cache_opt_in("summarizer"))
 
     system_prompt = (
         "You are the Summarizer Agent.\n"
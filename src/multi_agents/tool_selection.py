@@ -0,0 +1,100 @@
+import json
+import os
+import re
+import threading
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.context_budget import count_tokens
+from src.tools import get_tools
+from .research_agent import build_research_prompt
+
+# Plan-driven tool subsets for the Research Agent.
+# The planner is told to use exact tool names, so the researcher is bound
+# to the tools its plan mentions (by name or by a few plain-word cues)
+# plus RESEARCH_BASE_TOOLS. Each distinct subset is compiled once by the
+# agent registry and reused. RESEARCH_TOOL_SELECTION=all restores the
+# full tool set.
+
+RESEARCH_TOOL_SELECTION = os.getenv("RESEARCH_TOOL_SELECTION", "plan").lower()
+RESEARCH_BASE_TOOLS = tuple(
+    name.strip()
+    for name in os.getenv("RESEARCH_BASE_TOOLS", "web_search,search_shared_memory").split(",")
+    if name.strip()
+)
+
+# Plain-language cues for tools the plan describes without naming them
+TOOL_CUES = {
+    "calculate": r"\b(calculat\w*|comput\w*|arithmetic|math\w*)\b",
+    "get_weather": r"\bweather\b",
+    "get_time": r"\b(current (date|time)|time ?zone|what time)\b",
+    "gen_password": r"\bpasswords?\b",
+    "read_file": r"\b(read|open|inspect)\w* (the |a )?file\b",
+    "write_file": r"\b(write|save|create)\w* (it |them |the \w+ )?(to|in|as) (a |the )?file\b",
+    "append_file": r"\bappend\w*\b",
+    "analyze_text": r"\banaly[sz]\w* (the |collected |long )?(text|document|log)s?\b",
+    "extract_keywords": r"\bkeywords?\b",
+    "decompose_task": r"\bdecompos\w*\b",
+    "structure_as_json": r"\bjson\b",
+    "generate_markdown_table": r"\b(markdown )?tables?\b",
+    "prepare_memory_entry": r"\b(store|save|remember)\w* (the )?(findings|results|knowledge)\b",
+}
+_CUE_PATTERNS = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in TOOL_CUES.items()}
+
+_stats = {"selections": 0, "full_tokens": 0, "selected_tokens": 0}
+_stats_lock = threading.Lock()
+_token_cache = {}
+
+
+def plan_tool_names(plan: str, available) -> set:
+    """Names of available tools the plan references"""
+    names = set()
+    for name in available:
+        if re.search(rf"\b{re.escape(name)}\b", plan):
+            names.add(name)
+        elif name in _CUE_PATTERNS and _CUE_PATTERNS[name].search(plan):
+            names.add(name)
+    return names
+
+
+def input_tokens(tools: list) -> int:
+    """Estimated system prompt + tool schema tokens sent on every researcher turn"""
+    key = tuple(sorted(t.name for t in tools))
+    if key not in _token_cache:
+        schemas = json.dumps([convert_to_openai_tool(t) for t in tools])
+        _token_cache[key] = count_tokens(build_research_prompt(key)) + count_tokens(schemas)
+    return _token_cache[key]
+
+
+def select_research_tools(plan: str, mode: str = None) -> list:
+    """Tools to bind for this plan (ordered as in get_tools)"""
+    all_tools = get_tools()
+    if (mode or RESEARCH_TOOL_SELECTION) == "all":
+        return all_tools
+
+    available = [t.name for t in all_tools]
+    names = plan_tool_names(plan, available) | set(RESEARCH_BASE_TOOLS)
+    selected = [t for t in all_tools if t.name in names]
+
+    full, used = input_tokens(all_tools), input_tokens(selected)
+    with _stats_lock:
+        _stats["selections"] += 1
+        _stats["full_tokens"] += full
+        _stats["selected_tokens"] += used
+
+    print(
+        f"🧰 Researcher tools: {', '.join(t.name for t in selected)} "
+        f"(~{used} prompt+schema tokens vs ~{full} with all tools)"
+    )
+    return selected
+
+
+def tool_selection_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["mode"] = RESEARCH_TOOL_SELECTION
+    stats["tokens_saved"] = stats["full_tokens"] - stats["selected_tokens"]
+    stats["saved_ratio"] = (
+        stats["tokens_saved"] / stats["full_tokens"] if stats["full_tokens"] else 0.0
+    )
+    return stats
@@ -1,12 +1,27 @@
-from src.multi_agents import (
-    create_planner_agent,
-    create_research_agent,
-    create_summarizer_agent,
-    create_email_compose_agent
+from src.multi_agents import agent_registry, research_run_config, select_research_tools
+
+from src.memory import get_session_memory
+from src.shared_memory import get_shared_memory
+from src.embedding_cache import RequestContext
+from src.context_budget import (
+    HISTORY_MESSAGES,
+    fit_paragraphs,
+    fit_ranked_lines,
+    fit_recent_lines,
+    fit_sections,
+    format_history,
+    log_prompt_tokens
 )
-
-from src.memory import AgentMemory
-from src.shared_memory import SharedKnowledgeBase
+from src.router.planner_fastpath import classify_query, FASTPATH_MODE, FASTPATH_PLAN
+from src.semantic_cache import SEMANTIC_CACHE_ENABLED, lookup_cached_answer, store_cached_answer
+from src.tracing import current_span, span, traced
+from langchain_core.messages import AIMessage, AIMessageChunk
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import hashlib
+import os
+import time
 import uuid
 
 
@@ -23,187 +38,665 @@ def extract_text(content):
 
 DIRECT_GENERATION = "__DIRECT_GENERATION__"
 
-def run_multi_agent_workflow(user_query: str):
+EMAIL_INTENT_PHRASES = [
+    "write an email",
+    "compose an email",
+    "draft an email",
+    "send an email",
+    "email to",
+    "mail to"
+]
+
+# How shared-memory retrieval is scheduled relative to the planner:
+# - "serial":   look up context first and include it in the planner prompt
+# - "parallel": run the lookup concurrently with the planner call and give
+#               the context only to the researcher and summarizer
+CONTEXT_MODES = ("serial", "parallel")
+SHARED_CONTEXT_MODE = os.getenv("SHARED_CONTEXT_MODE", "serial").lower()
+
+# Worker threads for shared-memory lookups overlapped with the planner
+_context_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="shared-context")
+
+SKIP_RESEARCH_PHRASES = [
+    "no research required",
+    "research not required",
+    "research not needed",
+    "generate the answer directly"
+]
+
+
+# =========================
+# WORKFLOW HELPERS
+# (shared by the sync and async orchestrators)
+# =========================
+
+def has_email_intent(user_query: str) -> bool:
+    return any(phrase in user_query.lower() for phrase in EMAIL_INTENT_PHRASES)
+
+
+def is_research_skipped(plan: str) -> bool:
+    return any(phrase in plan.lower() for phrase in SKIP_RESEARCH_PHRASES)
+
+
+def query_intent(email_intent: bool) -> str:
+    """Intent label used to partition the semantic cache"""
+    return "email" if email_intent else "task"
+
+
+def agent_input(content: str) -> dict:
+    return {"messages": [{"role": "user", "content": content}]}
+
+
+def invoke_agent(name: str, agent, content: str, config: dict = None) -> dict:
+    with span(name, kind="agent"):
+        return agent.invoke(agent_input(content), config=config)
+
+
+async def ainvoke_agent(name: str, agent, content: str, config: dict = None) -> dict:
+    with span(name, kind="agent"):
+        return await agent.ainvoke(agent_input(content), config=config)
+
+
+def last_message_text(result: dict) -> str:
+    return extract_text(result["messages"][-1].content)
+
+
+def get_shared_context(shared_memory, user_query: str, request: RequestContext = None) -> str:
+    """Shared-memory lookup; embeds the query here unless an earlier stage already did"""
+    try:
+        query_vector = get_query_vector(request) if request is not None else None
+        return shared_memory.get_context(user_query, query_vector=query_vector)
+    except Exception:
+        return "Shared memory unavailable."
+
+
+def get_query_vector(request: RequestContext):
+    """Embed the request query once; None lets each stage fall back on its own"""
+    try:
+        return request.query_vector
+    except Exception:
+        return None
+
+
+def needs_early_query_vector() -> bool:
+    """Whether a stage before the planner (semantic cache, fast-path kNN) uses the vector"""
+    return SEMANTIC_CACHE_ENABLED or FASTPATH_MODE in ("embeddings", "hybrid")
+
+
+def resolve_context_mode(context_mode: str = None) -> str:
+    mode = (context_mode or SHARED_CONTEXT_MODE).lower()
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"Unknown context mode: {mode}")
+    return mode
+
+
+def build_planner_context(user_query: str, shared_context: str, planner_history) -> str:
+    sections = fit_sections("planner", user_query, {
+        "history": (
+            format_history(planner_history.messages, HISTORY_MESSAGES["planner"]),
+            fit_recent_lines
+        ),
+        "shared": (shared_context or "", fit_ranked_lines),
+    })
+
+    # In parallel mode the planner runs before shared context is available
+    knowledge_line = (
+        f"Shared knowledge: {sections['shared']}\n" if shared_context is not None else ""
+    )
+    prompt = f"""
+Previous conversations: {sections['history'] or 'None'}
+{knowledge_line}
+User Query: {user_query}
+
+Plan execution steps for Research Agent.
+"""
+    log_prompt_tokens("planner", prompt, sections)
+    return prompt
+
+
+def build_researcher_context(plan: str, shared_context: str, researcher_history) -> str:
+    sections = fit_sections("researcher", plan, {
+        "history": (
+            format_history(researcher_history.messages, HISTORY_MESSAGES["researcher"]),
+            fit_recent_lines
+        ),
+        "shared": (shared_context or "", fit_ranked_lines),
+    })
+
+    prompt = f"""
+Previous research: {sections['history'] or 'None'}
+Shared knowledge: {sections['shared'] or 'None'}
+
+Execution Plan: {plan}
+
+Execute research steps and return raw data only.
+"""
+    log_prompt_tokens("researcher", prompt, sections)
+    return prompt
+
+
+def build_summarizer_context(user_query: str, shared_context: str, raw_data: str) -> str:
+    if raw_data == DIRECT_GENERATION:
+        prompt = f"""
+User Query: {user_query}
+
+Generate the final answer directly.
+"""
+        log_prompt_tokens("summarizer", prompt)
+        return prompt
+
+    sections = fit_sections("summarizer", user_query, {
+        "shared": (shared_context or "", fit_ranked_lines),
+        "research": (raw_data, fit_paragraphs),
+    })
+
+    prompt = f"""
+Original Query: {user_query}
+Shared Knowledge: {sections['shared'] or 'None'}
+Research Data: {sections['research']}
+
+Create polished final answer.
+"""
+    log_prompt_tokens("summarizer", prompt, sections)
+    return prompt
+
+
+def build_email_context(final_answer: str) -> str:
+    return f"""
+Final summarized content:
+{final_answer}
+
+Convert the above into a professional email.
+Use square-bracket placeholders where details are missing.
+"""
+
+
+def build_memory_fact(user_query: str, raw_data: str, final_answer: str) -> str:
+    return (
+        f"Q: {user_query[:50]}... | "
+        f"Key facts: {raw_data[:150]}... | "
+        f"Summary: {final_answer[:100]}..."
+    )
+
+
+def history_key(agent_memory, ids: dict) -> str:
+    """
+    Fingerprint of the chat history the planner and researcher prompts will
+    include ("" when there is none), used to scope semantic cache entries.
+    """
+    histories = [
+        format_history(agent_memory.get_agent_memory(ids[name]).messages, HISTORY_MESSAGES[name])
+        for name in ("planner", "researcher")
+    ]
+    if not any(histories):
+        return ""
+    return hashlib.sha256("\x00".join(histories).encode("utf-8")).hexdigest()[:16]
+
+
+def agent_ids(session_id: str) -> dict:
+    return {
+        "planner": f"{session_id}-planner",
+        "researcher": f"{session_id}-researcher",
+        "summarizer": f"{session_id}-summarizer",
+        "email": f"{session_id}-email",
+    }
+
+
+def use_fastpath_plan(fastpath: dict):
+    """
+    Plan for queries the local classifier marked generation-only.
+    The direct-generation summarizer prompt never uses shared context,
+    so the FAISS lookup is skipped along with the planner call.
+    """
+    print(
+        f"⚡ Planner skipped (local {fastpath['method']}, "
+        f"confidence {fastpath['confidence']:.2f})"
+    )
+    return FASTPATH_PLAN, None
+
+
+# =========================
+# SYNC ORCHESTRATOR
+# =========================
+
+def plan_with_context(
+    user_query: str,
+    shared_memory,
+    planner_history,
+    context_mode: str,
+    request: RequestContext = None
+):
+    """Run the shared-memory lookup and the planner; return (plan, shared_context)"""
+    started = time.perf_counter()
+
+    # Agents come from the process-wide registry and are built on first use
+    planner = agent_registry.get("planner")
+
+    if context_mode == "parallel":
+        # Run under a copy of this context so the FAISS span keeps its parent
+        context_future = _context_executor.submit(
+            contextvars.copy_context().run,
+            get_shared_context, shared_memory, user_query, request
+        )
+        planner_context = build_planner_context(user_query, None, planner_history)
+        planner_result = invoke_agent("planner", planner, planner_context)
+        shared_context = context_future.result()
+    else:
+        shared_context = get_shared_context(shared_memory, user_query, request)
+        planner_context = build_planner_context(user_query, shared_context, planner_history)
+        planner_result = invoke_agent("planner", planner, planner_context)
+
+    plan = last_message_text(planner_result).strip()
+
+    print(f"⏱️ Context + planner ({context_mode}): {time.perf_counter() - started:.2f}s")
+    return plan, shared_context
+
+
+@traced("workflow", kind="workflow", record_args=True)
+def run_multi_agent_workflow(user_query: str, context_mode: str = None, session_id: str = None):
     print(f"🔍 Processing: {user_query}")
 
+    context_mode = resolve_context_mode(context_mode)
+
     # =========================
     # INITIALIZE MEMORY
     # =========================
-    agent_memory = AgentMemory()
-    shared_memory = SharedKnowledgeBase()
+    # Agent histories carry over between turns of the same session_id;
+    # without one the run gets a throwaway memory
+    agent_memory = get_session_memory(session_id)
+    shared_memory = get_shared_memory()
 
-    session_id = str(uuid.uuid4())[:8]
+    ids = agent_ids(session_id or str(uuid.uuid4())[:8])
+    # This turn's messages, saved to session memory in one transaction
+    turn = []
 
     # =========================
     # EMAIL INTENT CHECK
     # =========================
-    email_intent = any(
-        phrase in user_query.lower()
-        for phrase in [
-            "write an email",
-            "compose an email",
-            "draft an email",
-            "send an email",
-            "email to",
-            "mail to"
-        ]
-    )
+    email_intent = has_email_intent(user_query)
+    intent = query_intent(email_intent)
+
+    # Outcome labels for the workflow span (and its /metrics histograms)
+    workflow_span = current_span()
+    workflow_span.set(email_intent=email_intent, cache_hit=False)
 
     # =========================
-    # SHARED MEMORY LOOKUP
+    # SEMANTIC CACHE
     # =========================
-    try:
-        shared_context = shared_memory.get_context(user_query)
-    except Exception:
-        shared_context = "Shared memory unavailable."
+    # The query is embedded at most once per request. It is only forced here
+    # when the semantic cache or the fast-path kNN needs it before planning;
+    # otherwise the shared-memory lookup embeds it, overlapped with the
+    # planner in parallel mode
+    request = RequestContext(user_query)
+    query_vector = get_query_vector(request) if needs_early_query_vector() else None
+
+    # Answers are shared across sessions unless chat history shaped them
+    cache_key = history_key(agent_memory, ids)
+    cached_answer = lookup_cached_answer(user_query, intent, query_vector, cache_key)
+    if cached_answer is not None:
+        print("♻️ Served from semantic cache")
+        workflow_span.set(cache_hit=True)
+        return cached_answer
 
     # =========================
-    # AGENT IDS
+    # PLANNER FAST-PATH / SHARED MEMORY LOOKUP + PLANNER
     # =========================
-    planner_id = f"{session_id}-planner"
-    researcher_id = f"{session_id}-researcher"
-    summarizer_id = f"{session_id}-summarizer"
-    email_id = f"{session_id}-email"
+    planner_history = agent_memory.get_agent_memory(ids["planner"])
+    fastpath = classify_query(user_query, query_vector=query_vector)
+
+    if fastpath["direct"]:
+        plan, shared_context = use_fastpath_plan(fastpath)
+    else:
+        plan, shared_context = plan_with_context(
+            user_query, shared_memory, planner_history, context_mode, request
+        )
+
+    turn.append((ids["planner"], "user", user_query))
+    turn.append((ids["planner"], "assistant", plan))
+
+    print(f"Planner output:\n{plan}")
 
     # =========================
-    # CREATE AGENTS
+    # DECIDE RESEARCH
     # =========================
-    planner = create_planner_agent()
-    researcher = create_research_agent()
-    summarizer = create_summarizer_agent()
-    email_agent = create_email_compose_agent()
+    skip_research = is_research_skipped(plan)
+    workflow_span.set(research_skipped=skip_research)
 
     # =========================
-    # PLANNER
+    # RESEARCHER (ONLY IF NEEDED)
     # =========================
-    planner_history = agent_memory.get_agent_memory(planner_id)
+    if skip_research:
+        raw_data = DIRECT_GENERATION
+    else:
+        researcher_history = agent_memory.get_agent_memory(ids["researcher"])
+        researcher_context = build_researcher_context(plan, shared_context, researcher_history)
 
-    planner_context = f"""
-Previous conversations: {planner_history.messages[-3:] if planner_history.messages else 'None'}
-Shared knowledge: {shared_context}
+        # One cached agent variant per tool subset the plan calls for
+        researcher = agent_registry.get("researcher", tools=select_research_tools(plan))
+        researcher_result = invoke_agent(
+            "researcher", researcher, researcher_context, config=research_run_config()
+        )
 
-User Query: {user_query}
+        raw_data = last_message_text(researcher_result)
 
-Plan execution steps for Research Agent.
-"""
+        turn.append((ids["researcher"], "user", plan))
+        turn.append((ids["researcher"], "assistant", raw_data))
 
-    planner_result = planner.invoke({
-        "messages": [{"role": "user", "content": planner_context}]
-    })
+        print("Researcher output:")
+        print(raw_data)
 
-    plan = extract_text(planner_result["messages"][-1].content).strip()
+    # =========================
+    # SUMMARIZER
+    # =========================
+    summarizer_context = build_summarizer_context(user_query, shared_context, raw_data)
 
-    agent_memory.add_message(planner_id, "user", user_query)
-    agent_memory.add_message(planner_id, "assistant", plan)
+    summarizer = agent_registry.get("summarizer")
+    summarizer_result = invoke_agent("summarizer", summarizer, summarizer_context)
 
-    print(f"Planner output:\n{plan}")
+    final_answer = last_message_text(summarizer_result)
 
     # =========================
-    # DECIDE RESEARCH
+    # EMAIL AGENT (OPTIONAL)
+    # =========================
+    if email_intent:
+        email_agent = agent_registry.get("email")
+        email_result = invoke_agent("email", email_agent, build_email_context(final_answer))
+
+        final_answer = last_message_text(email_result)
+
+        turn.append((ids["email"], "user", final_answer))
+        turn.append((ids["email"], "assistant", final_answer))
+
+    # =========================
+    # SAVE MEMORY (ONLY WHEN USEFUL)
     # =========================
-    skip_research = any(
-        phrase in plan.lower()
-        for phrase in [
-            "no research required",
-            "research not required",
-            "research not needed",
-            "generate the answer directly"
-        ]
+    turn.append((ids["summarizer"], "user", raw_data))
+    turn.append((ids["summarizer"], "assistant", final_answer))
+    agent_memory.add_messages(turn)
+
+    if not email_intent and not skip_research:
+        shared_memory.save_fact(
+            build_memory_fact(user_query, raw_data, final_answer)
+        )
+
+    store_cached_answer(user_query, final_answer, intent, query_vector, cache_key)
+
+    return final_answer
+
+
+# =========================
+# ASYNC ORCHESTRATOR
+# =========================
+
+# Graph node that runs the chat model inside create_agent graphs
+MODEL_NODES = ("model", "agent")
+
+
+async def astream_agent(agent, content: str):
+    """
+    Run an agent and yield ("token", text) for each generated text chunk,
+    then ("result", final_state) once the graph finishes.
+    Models that do not stream (cassette replay, the scripted fake) produce
+    no chunks; their final answer is then sent as a single token.
+    """
+    final_state = None
+    streamed = False
+
+    async for mode, payload in agent.astream(
+        agent_input(content),
+        stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            final_state = payload
+            continue
+
+        chunk, metadata = payload
+        if (
+            isinstance(chunk, AIMessageChunk)
+            and metadata.get("langgraph_node") in MODEL_NODES
+        ):
+            text = extract_text(chunk.content)
+            if text:
+                streamed = True
+                yield "token", text
+
+    if not streamed and final_state and isinstance(final_state["messages"][-1], AIMessage):
+        text = last_message_text(final_state)
+        if text:
+            yield "token", text
+
+    yield "result", final_state
+
+
+async def _arun_agent(name: str, agent, content: str, stream_tokens: bool):
+    """Yield token events (if streaming) and finally the result state"""
+    if not stream_tokens:
+        yield "result", await ainvoke_agent(name, agent, content)
+        return
+
+    with span(name, kind="agent", streaming=True):
+        async for kind, payload in astream_agent(agent, content):
+            yield kind, payload
+
+
+async def aplan_with_context(
+    user_query: str,
+    shared_memory,
+    planner_history,
+    context_mode: str,
+    request: RequestContext = None
+):
+    """Async plan_with_context: embedding and FAISS work run in a worker thread"""
+    started = time.perf_counter()
+    planner = agent_registry.get("planner")
+
+    if context_mode == "parallel":
+        context_task = asyncio.ensure_future(
+            asyncio.to_thread(get_shared_context, shared_memory, user_query, request)
+        )
+        planner_context = build_planner_context(user_query, None, planner_history)
+        try:
+            planner_result = await ainvoke_agent("planner", planner, planner_context)
+        except BaseException:
+            context_task.cancel()
+            raise
+        shared_context = await context_task
+    else:
+        shared_context = await asyncio.to_thread(
+            get_shared_context, shared_memory, user_query, request
+        )
+        planner_context = build_planner_context(user_query, shared_context, planner_history)
+        planner_result = await ainvoke_agent("planner", planner, planner_context)
+
+    plan = last_message_text(planner_result).strip()
+
+    print(f"⏱️ Context + planner ({context_mode}): {time.perf_counter() - started:.2f}s")
+    return plan, shared_context
+
+
+def stage_event(stage: str, **fields) -> dict:
+    return {"event": "stage", "stage": stage, **fields}
+
+
+@traced("workflow", kind="workflow", record_args=True)
+async def astream_multi_agent_workflow(
+    user_query: str,
+    stream_tokens: bool = True,
+    context_mode: str = None,
+    session_id: str = None
+):
+    """
+    Async orchestrator as an event stream.
+
+    Yields stage events as each agent finishes, token events while the
+    user-facing agent (summarizer, or email agent for email requests)
+    generates, and a final {"event": "done", "output": ...} event.
+    Agents are awaited natively and blocking FAISS/embedding work runs in a
+    worker thread, so the event loop stays free while waiting on the LLM.
+    """
+    print(f"🔍 Processing: {user_query}")
+
+    context_mode = resolve_context_mode(context_mode)
+
+    # Loading a session reads SQLite, so it stays off the event loop
+    agent_memory = await asyncio.to_thread(get_session_memory, session_id)
+    shared_memory = get_shared_memory()
+
+    ids = agent_ids(session_id or str(uuid.uuid4())[:8])
+    # This turn's messages, saved to session memory in one transaction
+    turn = []
+
+    email_intent = has_email_intent(user_query)
+    intent = query_intent(email_intent)
+
+    # Outcome labels for the workflow span (and its /metrics histograms)
+    workflow_span = current_span()
+    workflow_span.set(email_intent=email_intent, cache_hit=False)
+    yield stage_event("router", email_intent=email_intent)
+
+    request = RequestContext(user_query)
+    query_vector = None
+    if needs_early_query_vector():
+        query_vector = await asyncio.to_thread(get_query_vector, request)
+
+    cache_key = history_key(agent_memory, ids)
+    cached_answer = await asyncio.to_thread(
+        lookup_cached_answer, user_query, intent, query_vector, cache_key
     )
+    if cached_answer is not None:
+        print("♻️ Served from semantic cache")
+        workflow_span.set(cache_hit=True)
+        yield stage_event("cache", hit=True)
+        yield {"event": "done", "output": cached_answer}
+        return
 
     # =========================
-    # RESEARCHER (ONLY IF NEEDED)
+    # PLANNER FAST-PATH / SHARED MEMORY LOOKUP + PLANNER
     # =========================
-    if skip_research:
-        raw_data = DIRECT_GENERATION
+    planner_history = agent_memory.get_agent_memory(ids["planner"])
+    fastpath = await asyncio.to_thread(
+        classify_query, user_query, query_vector=query_vector
+    )
+
+    if fastpath["direct"]:
+        plan, shared_context = use_fastpath_plan(fastpath)
     else:
-        researcher_history = agent_memory.get_agent_memory(researcher_id)
+        plan, shared_context = await aplan_with_context(
+            user_query, shared_memory, planner_history, context_mode, request
+        )
 
-        researcher_context = f"""
-Previous research: {researcher_history.messages[-2:] if researcher_history.messages else 'None'}
-Shared knowledge: {shared_context}
+    turn.append((ids["planner"], "user", user_query))
+    turn.append((ids["planner"], "assistant", plan))
 
-Execution Plan: {plan}
+    print(f"Planner output:\n{plan}")
 
-Execute research steps and return raw data only.
-"""
+    skip_research = is_research_skipped(plan)
+    workflow_span.set(research_skipped=skip_research)
+    yield stage_event(
+        "planner",
+        skip_research=skip_research,
+        fastpath=fastpath["direct"]
+    )
 
-        researcher_result = researcher.invoke({
-            "messages": [{"role": "user", "content": researcher_context}]
-        })
+    # =========================
+    # RESEARCHER (ONLY IF NEEDED)
+    # =========================
+    if skip_research:
+        raw_data = DIRECT_GENERATION
+    else:
+        researcher_history = agent_memory.get_agent_memory(ids["researcher"])
+        researcher_context = build_researcher_context(plan, shared_context, researcher_history)
 
-        raw_data = extract_text(
-            researcher_result["messages"][-1].content
+        # One cached agent variant per tool subset the plan calls for
+        researcher = agent_registry.get("researcher", tools=select_research_tools(plan))
+        researcher_result = await ainvoke_agent(
+            "researcher", researcher, researcher_context, config=research_run_config()
         )
 
-        agent_memory.add_message(researcher_id, "user", plan)
-        agent_memory.add_message(researcher_id, "assistant", raw_data)
+        raw_data = last_message_text(researcher_result)
+
+        turn.append((ids["researcher"], "user", plan))
+        turn.append((ids["researcher"], "assistant", raw_data))
 
-    if not skip_research:
         print("Researcher output:")
         print(raw_data)
 
+    yield stage_event("researcher", skipped=skip_research)
 
     # =========================
     # SUMMARIZER
     # =========================
-    if raw_data == DIRECT_GENERATION:
-        summarizer_context = f"""
-User Query: {user_query}
-
-Generate the final answer directly.
-"""
-    else:
-        summarizer_context = f"""
-Original Query: {user_query}
-Shared Knowledge: {shared_context}
-Research Data: {raw_data}
+    summarizer_context = build_summarizer_context(user_query, shared_context, raw_data)
 
-Create polished final answer.
-"""
+    summarizer = agent_registry.get("summarizer")
+    summarizer_result = None
 
-    summarizer_result = summarizer.invoke({
-        "messages": [{"role": "user", "content": summarizer_context}]
-    })
+    # The summary is only user-facing when no email follows it
+    async for kind, payload in _arun_agent(
+        "summarizer", summarizer, summarizer_context, stream_tokens and not email_intent
+    ):
+        if kind == "token":
+            yield {"event": "token", "text": payload}
+        else:
+            summarizer_result = payload
 
-    final_answer = extract_text(
-        summarizer_result["messages"][-1].content
-    )
+    final_answer = last_message_text(summarizer_result)
+    yield stage_event("summarizer")
 
     # =========================
     # EMAIL AGENT (OPTIONAL)
     # =========================
     if email_intent:
-        email_context = f"""
-Final summarized content:
-{final_answer}
+        email_agent = agent_registry.get("email")
+        email_result = None
 
-Convert the above into a professional email.
-Use square-bracket placeholders where details are missing.
-"""
+        async for kind, payload in _arun_agent(
+            "email", email_agent, build_email_context(final_answer), stream_tokens
+        ):
+            if kind == "token":
+                yield {"event": "token", "text": payload}
+            else:
+                email_result = payload
 
-        email_result = email_agent.invoke({
-            "messages": [{"role": "user", "content": email_context}]
-        })
+        final_answer = last_message_text(email_result)
 
-        final_answer = extract_text(
-            email_result["messages"][-1].content
-        )
+        turn.append((ids["email"], "user", final_answer))
+        turn.append((ids["email"], "assistant", final_answer))
 
-        agent_memory.add_message(email_id, "user", final_answer)
-        agent_memory.add_message(email_id, "assistant", final_answer)
+        yield stage_event("email")
 
     # =========================
     # SAVE MEMORY (ONLY WHEN USEFUL)
     # =========================
-    agent_memory.add_message(summarizer_id, "user", raw_data)
-    agent_memory.add_message(summarizer_id, "assistant", final_answer)
+    turn.append((ids["summarizer"], "user", raw_data))
+    turn.append((ids["summarizer"], "assistant", final_answer))
+    await asyncio.to_thread(agent_memory.add_messages, turn)
 
     if not email_intent and not skip_research:
-        shared_memory.save_fact(
-            f"Q: {user_query[:50]}... | "
-            f"Key facts: {raw_data[:150]}... | "
-            f"Summary: {final_answer[:100]}..."
+        await asyncio.to_thread(
+            shared_memory.save_fact,
+            build_memory_fact(user_query, raw_data, final_answer)
         )
 
-    return final_answer
\ No newline at end of file
+    await asyncio.to_thread(
+        store_cached_answer, user_query, final_answer, intent, query_vector, cache_key
+    )
+
+    yield {"event": "done", "output": final_answer}
+
+
+async def arun_multi_agent_workflow(
+    user_query: str,
+    context_mode: str = None,
+    session_id: str = None
+):
+    """Async twin of run_multi_agent_workflow; returns the final answer"""
+    final_answer = None
+
+    async for event in astream_multi_agent_workflow(
+        user_query, stream_tokens=False, context_mode=context_mode, session_id=session_id
+    ):
+        if event["event"] == "done":
+            final_answer = event["output"]
+
+    return final_answer
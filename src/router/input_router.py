@@ -1,11 +1,10 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm import get_llm, cache_opt_in
 import json
+from src.tracing import traced
+from src.router.local_router import classify_route, observe_llm_route
 
-# Cheap + fast model for routing
-router_llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.0
-)
+# Cheap + fast model for routing (shared with other temperature-0 callers)
+router_llm = get_llm("gemini-2.5-flash", 0.0, cache=cache_opt_in("router"))
 
 # -------- EMAIL HEURISTICS -------- #
 
@@ -66,6 +65,7 @@ Respond ONLY in valid JSON.
 
 # -------- ROUTER FUNCTION -------- #
 
+@traced("route_input", kind="router", record_result=True)
 def route_input(user_input: str, state):
     """
     Decide how the system should handle the user input.
@@ -93,6 +93,12 @@ def route_input(user_input: str, state):
     if is_email and has_context:
         return {"mode": "COMPLEX_TASK"}
 
+    # -------- LOCAL kNN ROUTING -------- #
+    # Clear-cut CHAT / COMPLEX_TASK never reach the router LLM
+    local = classify_route(user_input)
+    if local["mode"] is not None and not local["audit"]:
+        return {"mode": local["mode"]}
+
     # -------- LLM-BASED ROUTING -------- #
     prompt = f"""
 {ROUTER_SYSTEM_PROMPT}
@@ -117,6 +123,8 @@ JSON Response Format:
         return {"mode": "COMPLEX_TASK"}
 
     mode = decision.get("mode")
+    if mode in ("CHAT", "CLARIFY", "COMPLEX_TASK"):
+        observe_llm_route(user_input, mode, local)
 
     if mode == "CLARIFY":
         return {
@@ -0,0 +1,91 @@
+from collections import deque
+import threading
+
+import numpy as np
+
+from src.shared_memory import get_embeddings
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class KNNClassifier:
+    """
+    Small k-nearest-neighbour text classifier over the shared MiniLM embeddings.
+
+    Seed examples are embedded in one batch on first use. Extra examples can be
+    learned online; those live in a bounded window so memory stays flat.
+    """
+
+    def __init__(self, examples: list, k: int = 5, max_learned: int = 1000):
+        self.k = k
+        self._seed = list(examples)
+        self._seed_vectors = None
+        self._learned = deque(maxlen=max_learned)
+        self._matrix = None
+        self._labels = []
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        # Caller holds the lock
+        vectors = [self._seed_vectors] + [v for _, v in self._learned]
+        self._matrix = np.vstack(vectors) if vectors else None
+        self._labels = [label for _, label in self._seed] + [label for label, _ in self._learned]
+
+    def _ensure_ready(self):
+        if self._matrix is not None:
+            return
+        with self._lock:
+            if self._matrix is not None:
+                return
+            texts = [text for text, _ in self._seed]
+            self._seed_vectors = _normalize(get_embeddings().embed_documents(texts))
+            self._rebuild()
+
+    def embed(self, text: str) -> np.ndarray:
+        return _normalize(get_embeddings().embed_query(text))[0]
+
+    def add_example(self, text: str, label: str, vector=None):
+        """Learn a new labelled example online"""
+        self._ensure_ready()
+        vector = _normalize(vector if vector is not None else self.embed(text))
+        with self._lock:
+            self._learned.append((label, vector))
+            self._rebuild()
+
+    def predict(self, text: str = None, vector=None) -> dict:
+        """
+        Return {"label", "confidence", "similarity"} for the nearest examples.
+        confidence is the similarity-weighted share of the winning label among
+        the k neighbours; similarity is the best single match.
+        """
+        self._ensure_ready()
+        query = _normalize(vector if vector is not None else self.embed(text))[0]
+
+        with self._lock:
+            matrix, labels = self._matrix, self._labels
+
+        sims = matrix @ query
+        k = min(self.k, len(labels))
+        top = np.argpartition(-sims, k - 1)[:k]
+
+        weights = {}
+        for i in top:
+            weights[labels[i]] = weights.get(labels[i], 0.0) + max(float(sims[i]), 0.0)
+
+        total = sum(weights.values())
+        if total <= 0:
+            return {"label": None, "confidence": 0.0, "similarity": float(sims.max())}
+
+        label = max(weights, key=weights.get)
+        return {
+            "label": label,
+            "confidence": weights[label] / total,
+            "similarity": float(sims[top].max()),
+        }
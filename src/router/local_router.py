@@ -0,0 +1,246 @@
+import os
+import random
+import re
+import threading
+import time
+
+from src.router.knn_classifier import KNNClassifier
+from src.tracing import current_span, traced
+
+# Local first stage for route_input.
+# Clear-cut CHAT / COMPLEX_TASK messages are routed by a kNN over MiniLM
+# embeddings of labelled examples; only the uncertain band (confidence or
+# similarity below threshold) goes to the router LLM. LLM decisions are
+# learned back as examples (LOCAL_ROUTER_LEARN) and compared with what the
+# kNN predicted, so bypass and disagreement rates are reported per mode.
+# LOCAL_ROUTER_AUDIT_RATE sends a share of confident local decisions to the
+# LLM as well, to measure disagreement on the bypassed traffic itself.
+#
+# LOCAL_ROUTER modes:
+# - off:        always call the router LLM (default)
+# - embeddings: kNN first, LLM in the uncertain band
+
+LOCAL_ROUTER_MODES = ("off", "embeddings")
+LOCAL_ROUTER_MODE = os.getenv("LOCAL_ROUTER", "off").lower()
+LOCAL_ROUTER_THRESHOLD = float(os.getenv("LOCAL_ROUTER_THRESHOLD", "0.8"))
+LOCAL_ROUTER_MIN_SIMILARITY = float(os.getenv("LOCAL_ROUTER_MIN_SIMILARITY", "0.6"))
+LOCAL_ROUTER_LEARN = os.getenv("LOCAL_ROUTER_LEARN", "true").lower() in ("1", "true", "yes")
+LOCAL_ROUTER_AUDIT_RATE = float(os.getenv("LOCAL_ROUTER_AUDIT_RATE", "0"))
+LOCAL_ROUTER_MAX_LEARNED = int(os.getenv("LOCAL_ROUTER_MAX_LEARNED", "1000"))
+
+CHAT = "CHAT"
+COMPLEX_TASK = "COMPLEX_TASK"
+LOCAL_MODES = (CHAT, COMPLEX_TASK)
+
+# -------- LABELLED EXAMPLES -------- #
+
+LABELLED_EXAMPLES = [
+    ("hi", CHAT),
+    ("hello there", CHAT),
+    ("hey, how are you?", CHAT),
+    ("good morning", CHAT),
+    ("thanks!", CHAT),
+    ("thank you so much", CHAT),
+    ("ok cool", CHAT),
+    ("that's great, nice work", CHAT),
+    ("lol that's funny", CHAT),
+    ("bye, see you later", CHAT),
+    ("good night", CHAT),
+    ("what's up?", CHAT),
+    ("you're awesome", CHAT),
+    ("I'm feeling tired today", CHAT),
+    ("Write a Python function to reverse a string", COMPLEX_TASK),
+    ("Explain recursion with an example", COMPLEX_TASK),
+    ("What are the latest trends in artificial intelligence?", COMPLEX_TASK),
+    ("What is the weather in London right now?", COMPLEX_TASK),
+    ("Compare the pricing of AWS and Azure", COMPLEX_TASK),
+    ("Summarize this article for me", COMPLEX_TASK),
+    ("Generate a secure password of length 20", COMPLEX_TASK),
+    ("Create a markdown table comparing React and Vue", COMPLEX_TASK),
+    ("Research the top companies using LangChain in production", COMPLEX_TASK),
+    ("Calculate 15% of 2300", COMPLEX_TASK),
+    ("Read notes.txt and list the action items", COMPLEX_TASK),
+    ("Plan a three day trip to Tokyo", COMPLEX_TASK),
+    ("Write a SQL query to find duplicate rows", COMPLEX_TASK),
+    ("Find recent statistics on electric vehicle adoption", COMPLEX_TASK),
+]
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+# Normalised text -> label for exact repeats ("thanks!", "hi"), no embedding needed
+_exact = {}
+_exact_lock = threading.Lock()
+MAX_EXACT = 5000
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+def _remember_exact(text: str, label: str):
+    key = _normalize_text(text)
+    if not key:
+        return
+    with _exact_lock:
+        if key in _exact or len(_exact) < MAX_EXACT:
+            _exact[key] = label
+
+
+for _text, _label in LABELLED_EXAMPLES:
+    _remember_exact(_text, _label)
+
+
+def get_classifier() -> KNNClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = KNNClassifier(LABELLED_EXAMPLES, k=5, max_learned=LOCAL_ROUTER_MAX_LEARNED)
+    return _classifier
+
+
+# -------- COUNTERS -------- #
+
+_stats = {
+    "checked": 0,
+    "bypassed": 0,
+    "bypassed_exact": 0,
+    "fallbacks": 0,
+    "errors": 0,
+    "learned": 0,
+    "local_ms_total": 0.0,
+    "modes": {
+        mode: {"bypassed": 0, "compared": 0, "disagreed": 0, "audited": 0, "audit_disagreed": 0}
+        for mode in LOCAL_MODES
+    },
+}
+_stats_lock = threading.Lock()
+
+
+def local_router_stats() -> dict:
+    """Bypass and disagreement rates since process start"""
+    with _stats_lock:
+        stats = {key: value for key, value in _stats.items() if key != "modes"}
+        modes = {mode: dict(counts) for mode, counts in _stats["modes"].items()}
+
+    checked = stats["checked"]
+    stats["mode"] = LOCAL_ROUTER_MODE
+    stats["bypass_rate"] = stats["bypassed"] / checked if checked else 0.0
+    stats["local_ms_avg"] = stats.pop("local_ms_total") / checked if checked else 0.0
+    for counts in modes.values():
+        # Share of traffic routed locally as this mode, and how often the LLM
+        # chose differently when it also saw a message the kNN labelled so
+        counts["bypass_rate"] = counts["bypassed"] / checked if checked else 0.0
+        counts["disagreement_rate"] = (
+            counts["disagreed"] / counts["compared"] if counts["compared"] else 0.0
+        )
+        counts["audit_disagreement_rate"] = (
+            counts["audit_disagreed"] / counts["audited"] if counts["audited"] else 0.0
+        )
+    stats["modes"] = modes
+    return stats
+
+
+# -------- ROUTER -------- #
+
+@traced("local_router", kind="router")
+def classify_route(user_input: str, mode: str = None) -> dict:
+    """
+    Route locally when confident.
+
+    Returns {"mode": "CHAT" | "COMPLEX_TASK" | None, "predicted", "confidence",
+    "similarity", "method", "audit", "vector"}. mode is None in the uncertain
+    band; "audit" asks the caller to confirm a local decision with the LLM.
+    """
+    mode = (mode or LOCAL_ROUTER_MODE).lower()
+    if mode not in LOCAL_ROUTER_MODES:
+        raise ValueError(f"Unknown local router mode: {mode}")
+
+    decision = {
+        "mode": None, "predicted": None, "confidence": 0.0,
+        "similarity": 0.0, "method": None, "audit": False, "vector": None
+    }
+    if mode == "off":
+        return decision
+
+    started = time.perf_counter()
+    exact = _exact.get(_normalize_text(user_input))
+
+    if exact is not None:
+        decision.update(mode=exact, predicted=exact, confidence=1.0, similarity=1.0, method="exact")
+    else:
+        try:
+            classifier = get_classifier()
+            vector = classifier.embed(user_input)
+            prediction = classifier.predict(vector=vector)
+        except Exception:
+            # Embeddings unavailable: the router LLM decides
+            with _stats_lock:
+                _stats["checked"] += 1
+                _stats["errors"] += 1
+                _stats["fallbacks"] += 1
+            return decision
+
+        decision.update(
+            predicted=prediction["label"],
+            confidence=prediction["confidence"],
+            similarity=prediction["similarity"],
+            method="embeddings",
+            vector=vector
+        )
+        if (
+            prediction["label"] in LOCAL_MODES
+            and prediction["confidence"] >= LOCAL_ROUTER_THRESHOLD
+            and prediction["similarity"] >= LOCAL_ROUTER_MIN_SIMILARITY
+        ):
+            decision["mode"] = prediction["label"]
+
+    if decision["mode"] is not None and LOCAL_ROUTER_AUDIT_RATE > 0:
+        decision["audit"] = random.random() < LOCAL_ROUTER_AUDIT_RATE
+
+    current_span().set(
+        mode=decision["mode"], predicted=decision["predicted"],
+        confidence=round(decision["confidence"], 3), method=decision["method"]
+    )
+
+    with _stats_lock:
+        _stats["checked"] += 1
+        _stats["local_ms_total"] += (time.perf_counter() - started) * 1000
+        if decision["mode"] is None:
+            _stats["fallbacks"] += 1
+        elif not decision["audit"]:
+            _stats["bypassed"] += 1
+            _stats["modes"][decision["mode"]]["bypassed"] += 1
+            if decision["method"] == "exact":
+                _stats["bypassed_exact"] += 1
+
+    return decision
+
+
+def observe_llm_route(user_input: str, llm_mode: str, local: dict):
+    """Compare the router LLM's decision with the local prediction and learn from it"""
+    predicted = local.get("predicted")
+    if predicted in LOCAL_MODES:
+        with _stats_lock:
+            counts = _stats["modes"][predicted]
+            if local.get("audit"):
+                counts["audited"] += 1
+                counts["audit_disagreed"] += llm_mode != predicted
+            else:
+                counts["compared"] += 1
+                counts["disagreed"] += llm_mode != predicted
+
+    # CLARIFY needs a generated question, so only the two local modes are learned
+    if not LOCAL_ROUTER_LEARN or llm_mode not in LOCAL_MODES or local.get("method") is None:
+        return
+    if local.get("method") == "exact" and predicted == llm_mode:
+        return
+
+    try:
+        get_classifier().add_example(user_input, llm_mode, vector=local.get("vector"))
+    except Exception:
+        return
+    _remember_exact(user_input, llm_mode)
+    with _stats_lock:
+        _stats["learned"] += 1
@@ -0,0 +1,179 @@
+import os
+import re
+import threading
+
+from src.router.knn_classifier import KNNClassifier
+from src.tracing import traced
+
+# Local pre-planner classifier.
+# Decides, without an LLM call, that a query is a plain coding/explanation/
+# generation task the planner would answer with "No research required".
+#
+# PLANNER_FASTPATH modes:
+# - off:        always call the planner
+# - rules:      keyword/regex rules only
+# - embeddings: kNN over labelled examples (MiniLM)
+# - hybrid:     rules first, embeddings when the rules are not confident
+
+FASTPATH_MODES = ("off", "rules", "embeddings", "hybrid")
+FASTPATH_MODE = os.getenv("PLANNER_FASTPATH", "off").lower()
+RULE_THRESHOLD = float(os.getenv("PLANNER_FASTPATH_RULE_THRESHOLD", "0.8"))
+EMBEDDING_THRESHOLD = float(os.getenv("PLANNER_FASTPATH_EMBEDDING_THRESHOLD", "0.8"))
+MIN_SIMILARITY = float(os.getenv("PLANNER_FASTPATH_MIN_SIMILARITY", "0.55"))
+
+# Plan the planner itself emits for generation-only tasks
+FASTPATH_PLAN = "1. No research required. Generate the answer directly."
+
+DIRECT = "DIRECT"
+PLAN = "PLAN"
+
+# -------- RULES -------- #
+
+# (pattern, weight) — weights combine as independent evidence
+GENERATION_PATTERNS = (
+    (re.compile(r"^(please\s+)?(write|generate|create|implement|code|build)\b.*\b(function|program|script|code|class|method|query|regex|snippet|algorithm|example|poem|story|essay)\b"), 0.8),
+    (re.compile(r"^(please\s+)?(explain|describe|define|summari[sz]e the concept of)\b"), 0.75),
+    (re.compile(r"^(what is|what are|what does|how does|how do|how to|difference between|why does|why do)\b"), 0.5),
+    (re.compile(r"\b(in|using|with)\s+(python|java|javascript|typescript|c\+\+|c#|sql|go|golang|rust|bash|kotlin|swift)\b"), 0.5),
+    (re.compile(r"\b(for loop|recursion|linked list|binary search|sorting|big o|oop|inheritance|decorator|closure)\b"), 0.3),
+)
+
+# Anything that needs tools, fresh data or memory vetoes the fast-path
+RESEARCH_SIGNALS = re.compile(
+    r"\b(latest|recent|recently|current|currently|today|tonight|now|news|trend|trends|"
+    r"price|prices|pricing|stock|market|weather|temperature|statistics?|stats|"
+    r"20\d\d|compare|comparison|versus|vs|search|look up|lookup|web|online|sources?|"
+    r"previous|earlier|we talked|we discussed|last time|remember|"
+    r"file|read|save|append|calculate|compute|password|time in|timezone|"
+    r"table|json)\b"
+)
+
+# -------- LABELLED EXAMPLES -------- #
+
+LABELLED_EXAMPLES = [
+    ("Write a Python function to reverse a string", DIRECT),
+    ("Explain recursion with an example", DIRECT),
+    ("What is a closure in JavaScript?", DIRECT),
+    ("Write a SQL query to find duplicate rows", DIRECT),
+    ("Explain the difference between a list and a tuple", DIRECT),
+    ("Generate a regex that matches email addresses", DIRECT),
+    ("How does garbage collection work in Java?", DIRECT),
+    ("Write a short poem about the ocean", DIRECT),
+    ("Implement binary search in C++", DIRECT),
+    ("Explain what REST APIs are", DIRECT),
+    ("Describe the SOLID principles", DIRECT),
+    ("Write a bash script that renames all .txt files", DIRECT),
+    ("What are Python decorators and how do I use them?", DIRECT),
+    ("Create a class for a bank account in Java", DIRECT),
+    ("What are the latest trends in artificial intelligence?", PLAN),
+    ("Compare the pricing of AWS and Azure in 2024", PLAN),
+    ("What is the weather in London right now?", PLAN),
+    ("Find recent statistics on electric vehicle adoption", PLAN),
+    ("What did we talk about earlier?", PLAN),
+    ("Research the top companies using LangChain in production", PLAN),
+    ("Calculate the compound interest on 10000 at 5% for 10 years", PLAN),
+    ("Read notes.txt and summarize it", PLAN),
+    ("Give me today's top technology news", PLAN),
+    ("What are current regulations for drones in India?", PLAN),
+    ("Generate a secure password of length 20", PLAN),
+    ("Compare React and Vue adoption in industry with examples", PLAN),
+    ("What time is it in IST?", PLAN),
+    ("Save a summary of this discussion to a file", PLAN),
+]
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> KNNClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = KNNClassifier(LABELLED_EXAMPLES, k=5)
+    return _classifier
+
+
+# -------- COUNTERS -------- #
+
+_stats = {
+    "checked": 0,
+    "bypassed": 0,
+    "bypassed_rules": 0,
+    "bypassed_embeddings": 0,
+    "vetoed": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(*keys):
+    with _stats_lock:
+        for key in keys:
+            _stats[key] += 1
+
+
+def fastpath_stats() -> dict:
+    """Bypass counters and rate since process start"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["mode"] = FASTPATH_MODE
+    stats["bypass_rate"] = stats["bypassed"] / stats["checked"] if stats["checked"] else 0.0
+    return stats
+
+
+# -------- CLASSIFIER -------- #
+
+def rule_confidence(text: str) -> float:
+    """Confidence that text is generation-only, from the regex rules"""
+    miss = 1.0
+    for pattern, weight in GENERATION_PATTERNS:
+        if pattern.search(text):
+            miss *= 1.0 - weight
+    return 1.0 - miss
+
+
+@traced("planner_fastpath", kind="router", record_result=True)
+def classify_query(user_query: str, mode: str = None, query_vector=None) -> dict:
+    """
+    Decide whether the planner LLM can be skipped.
+
+    Returns {"direct": bool, "confidence": float, "method": str | None}.
+    "direct" is only True when the configured threshold is met.
+    """
+    mode = (mode or FASTPATH_MODE).lower()
+    if mode not in FASTPATH_MODES:
+        raise ValueError(f"Unknown planner fast-path mode: {mode}")
+
+    decision = {"direct": False, "confidence": 0.0, "method": None}
+    if mode == "off":
+        return decision
+
+    _count("checked")
+    text = user_query.strip().lower()
+
+    if RESEARCH_SIGNALS.search(text):
+        _count("vetoed")
+        return decision
+
+    if mode in ("rules", "hybrid"):
+        confidence = rule_confidence(text)
+        decision.update(confidence=confidence, method="rules")
+        if confidence >= RULE_THRESHOLD:
+            decision["direct"] = True
+            _count("bypassed", "bypassed_rules")
+            return decision
+
+    if mode in ("embeddings", "hybrid"):
+        try:
+            prediction = get_classifier().predict(user_query, vector=query_vector)
+        except Exception:
+            # Embeddings unavailable: fall back to the planner LLM
+            return decision
+
+        confidence = prediction["confidence"] if prediction["label"] == DIRECT else 0.0
+        decision.update(confidence=confidence, method="embeddings")
+        if confidence >= EMBEDDING_THRESHOLD and prediction["similarity"] >= MIN_SIMILARITY:
+            decision["direct"] = True
+            _count("bypassed", "bypassed_embeddings")
+
+    return decision
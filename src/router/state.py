@@ -1,3 +1,6 @@
+import uuid
+
+
 class SessionState:
     """
     Lightweight per-session memory.
@@ -5,6 +8,8 @@ class SessionState:
     def __init__(self):
         self.chat_history = []
         self.pending_task = None
+        # Keys the persistent per-agent history of the multi-agent workflow
+        self.session_id = str(uuid.uuid4())
 
 
 state = SessionState()
@@ -1,12 +1,12 @@
 from src.orchestrator import run_multi_agent_workflow
 
 
-def run_task(query: str, mode: str):
+def run_task(query: str, mode: str, session_id: str = None):
     """
     Dispatch task execution based on mode.
     """
 
     if mode == "COMPLEX_TASK":
-        return run_multi_agent_workflow(query)
+        return run_multi_agent_workflow(query, session_id=session_id)
 
     raise ValueError(f"Unknown mode: {mode}")
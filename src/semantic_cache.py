@@ -0,0 +1,177 @@
+from collections import OrderedDict
+import itertools
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.embedding_cache import get_embeddings
+
+# Semantic response cache in front of the multi-agent workflow.
+# Reuses a previous final answer when a new query embeds close enough
+# (cosine similarity) to one already answered. Entries are shared across
+# sessions; an answer generated with chat history in the prompt is keyed by
+# a fingerprint of that history, so it is only reused for the same history.
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+SEMANTIC_CACHE_EXCLUDED_INTENTS = tuple(
+    intent.strip()
+    for intent in os.getenv("SEMANTIC_CACHE_EXCLUDED_INTENTS", "email").split(",")
+    if intent.strip()
+)
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Bounded LRU of (query embedding -> final answer) with per-entry TTL.
+    Entries are only matched within the same intent and history key ("" for
+    turns without chat history); excluded intents are never looked up or stored.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: float = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        excluded_intents: tuple = SEMANTIC_CACHE_EXCLUDED_INTENTS,
+        embeddings=None
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.excluded_intents = set(excluded_intents)
+        self._embeddings = embeddings
+
+        self._entries = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evictions": 0,
+            "excluded": 0,
+        }
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def embed(self, query: str) -> np.ndarray:
+        return _unit(self.embeddings.embed_query(query))
+
+    def _prune_expired(self, now: float):
+        # Caller holds the lock
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._stats["expired"] += len(expired)
+
+    def lookup(self, query: str, intent: str = "task", query_vector=None, history_key: str = ""):
+        """Return a cached answer for a semantically equivalent query, or None"""
+        if intent in self.excluded_intents:
+            with self._lock:
+                self._stats["excluded"] += 1
+            return None
+
+        vector = _unit(query_vector) if query_vector is not None else self.embed(query)
+
+        with self._lock:
+            self._prune_expired(time.time())
+
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry["intent"] == intent and entry["history_key"] == history_key
+            ]
+            if not candidates:
+                self._stats["misses"] += 1
+                return None
+
+            matrix = np.vstack([entry["vector"] for _, entry in candidates])
+            sims = matrix @ vector
+            best = int(np.argmax(sims))
+
+            if sims[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self._stats["hits"] += 1
+            return entry["answer"]
+
+    def store(self, query: str, answer: str, intent: str = "task", query_vector=None, history_key: str = ""):
+        """Remember the final answer for a query"""
+        if intent in self.excluded_intents or not answer:
+            return
+
+        vector = _unit(query_vector) if query_vector is not None else self.embed(query)
+
+        with self._lock:
+            self._entries[next(self._ids)] = {
+                "query": query,
+                "answer": answer,
+                "intent": intent,
+                "history_key": history_key,
+                "vector": vector,
+                "created_at": time.time(),
+                "hits": 0,
+            }
+            self._stats["stores"] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["enabled"] = SEMANTIC_CACHE_ENABLED
+        return stats
+
+
+semantic_cache = SemanticCache()
+
+
+def lookup_cached_answer(query: str, intent: str, query_vector=None, history_key: str = ""):
+    """Cache lookup that is a no-op when the cache is disabled or unavailable"""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        return semantic_cache.lookup(query, intent, query_vector=query_vector, history_key=history_key)
+    except Exception as e:
+        print(f"⚠️ Semantic cache lookup failed: {e}")
+        return None
+
+
+def store_cached_answer(query: str, answer: str, intent: str, query_vector=None, history_key: str = ""):
+    if not SEMANTIC_CACHE_ENABLED:
+        return
+    try:
+        semantic_cache.store(query, answer, intent, query_vector=query_vector, history_key=history_key)
+    except Exception as e:
+        print(f"⚠️ Semantic cache store failed: {e}")
@@ -1,47 +1,697 @@
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from src.ann_index import (
+    build_index,
+    greedy_dedup,
+    index_kind,
+    needs_rebuild,
+    search_params,
+    select_index_kind,
+    unit_rows
+)
+from src.embedding_cache import get_embeddings
+from src.eviction import (
+    EVICTION_POLICY,
+    FACT_TTL,
+    MAX_FACTS,
+    TTL_SWEEP_INTERVAL,
+    expired_ids,
+    select_victims
+)
+from src.fact_store import SegmentLogStore
+from src.tracing import traced
+from contextlib import contextmanager
+import atexit
+import numpy as np
 import os
+import queue
+import threading
+import time
+import uuid
+
+DEFAULT_PERSIST_DIRECTORY = os.getenv("SHARED_MEMORY_DIR", "./faiss_index")
+
+# Write-behind for save_fact: facts are queued and a background thread embeds
+# and persists them in batches once FLUSH_BATCH_SIZE facts are pending or
+# FLUSH_INTERVAL seconds have passed since the first one.
+WRITE_BEHIND_ENABLED = os.getenv("SHARED_MEMORY_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+FLUSH_BATCH_SIZE = int(os.getenv("SHARED_MEMORY_FLUSH_BATCH_SIZE", "16"))
+FLUSH_INTERVAL = float(os.getenv("SHARED_MEMORY_FLUSH_INTERVAL", "2.0"))
+
+# Near-duplicate suppression in save_fact: a fact whose cosine similarity to
+# an existing one reaches DEDUP_THRESHOLD is not inserted. With "refresh" the
+# existing fact gets a new refreshed_at timestamp and duplicate count,
+# with "skip" it is left untouched.
+DEDUP_ENABLED = os.getenv("SHARED_MEMORY_DEDUP", "true").lower() in ("1", "true", "yes")
+DEDUP_THRESHOLD = float(os.getenv("SHARED_MEMORY_DEDUP_THRESHOLD", "0.95"))
+DEDUP_ACTIONS = ("refresh", "skip")
+DEDUP_ACTION = os.getenv("SHARED_MEMORY_DEDUP_ACTION", "refresh").lower()
+
+# Evicted facts are tombstoned (hidden from search, logged as deletes) and
+# physically removed by an index rebuild once they make up this share of it
+TOMBSTONE_REBUILD_RATIO = float(os.getenv("SHARED_MEMORY_TOMBSTONE_REBUILD_RATIO", "0.2"))
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or a single writer.
+    Writers are preferred so a steady stream of searches cannot starve saves.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class FactWriter:
+    """
+    Background writer that batches pending facts.
+    flush() blocks until everything submitted so far has been persisted.
+    """
+
+    def __init__(self, write_batch, batch_size: int = FLUSH_BATCH_SIZE, interval: float = FLUSH_INTERVAL):
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._flush_now = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="shared-memory-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, fact: str):
+        self._ensure_started()
+        self._queue.put(fact)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _collect_batch(self, first: str) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.interval
+
+        while len(batch) < self.batch_size and not self._flush_now.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+
+        # Drain whatever else is already queued when flushing
+        while self._flush_now.is_set() and len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch(self._queue.get())
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"⚠️ Shared memory write of {len(batch)} facts failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Persist all pending facts now and wait for the write to finish"""
+        if self._thread is None:
+            return
+        self._flush_now.set()
+        try:
+            self._queue.join()
+        finally:
+            self._flush_now.clear()
+
 
 class SharedKnowledgeBase:
-    def __init__(self, persist_directory: str = "./faiss_index"):
+    def __init__(
+        self,
+        persist_directory: str = DEFAULT_PERSIST_DIRECTORY,
+        embeddings=None,
+        write_behind: bool = WRITE_BEHIND_ENABLED,
+        dedup_threshold: float = DEDUP_THRESHOLD if DEDUP_ENABLED else None,
+        dedup_action: str = DEDUP_ACTION,
+        max_facts: int = MAX_FACTS,
+        eviction_policy: str = EVICTION_POLICY,
+        fact_ttl: float = FACT_TTL
+    ):
+        if dedup_action not in DEDUP_ACTIONS:
+            raise ValueError(f"Unknown dedup action: {dedup_action}")
+
         self.persist_directory = persist_directory
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Local embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+        self.dedup_threshold = dedup_threshold
+        self.dedup_action = dedup_action
+        self.max_facts = max_facts
+        self.eviction_policy = eviction_policy
+        self.fact_ttl = fact_ttl
+        self._embeddings = embeddings
+        self._vectorstore = None
+        self._store = None
+        self._load_lock = threading.Lock()
+        self._rw_lock = ReadWriteLock()
+        self._writer = FactWriter(self._write_facts) if write_behind else None
+
+        # Background ANN rebuild state (see src/ann_index.py)
+        self._trained_count = 0
+        self._rebuild_thread = None
+        self._rebuild_tail = None
+        self._rebuild_lock = threading.Lock()
+
+        # Eviction state: tombstoned ids still in the index, and retrieval
+        # stats not yet written to the segment log
+        self._tombstones = set()
+        self._access_updates = {}
+        self._access_lock = threading.Lock()
+        self._last_ttl_sweep = 0.0
+        self._evicted = 0
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    @property
+    def vectorstore(self) -> FAISS:
+        self._ensure_loaded()
+        return self._vectorstore
+
+    def _ensure_loaded(self):
+        """Load the index from disk on first use"""
+        if self._vectorstore is not None:
+            return
+
+        with self._load_lock:
+            if self._vectorstore is not None:
+                return
+
+            store = SegmentLogStore(self.persist_directory)
+            if not store.exists():
+                self._migrate_legacy_index(store)
+
+            # Base snapshot memory-mapped, segment log replayed on top; records
+            # deleted since the snapshot load as tombstones instead of being
+            # filtered out of the base (the next rebuild drops them)
+            records, blocks, deleted = store.load_blocks()
+            if len(deleted) == len(records):
+                records = [self._make_record("Shared knowledge base initialized.")]
+                blocks = [np.asarray(
+                    self.embeddings.embed_documents([records[0]["text"]]), dtype=np.float32
+                )]
+                store.append(records, blocks[0])
+                deleted = set()
+
+            self._store = store
+            self._tombstones = set(deleted)
+            self._vectorstore = self._build_vectorstore(records, blocks)
+
+        # Large stores start on the exact flat index; the HNSW/IVF index (and
+        # the removal of loaded tombstones) is built in the background
+        self._maybe_rebuild_index()
+
+    @staticmethod
+    def _make_record(text: str, metadata: dict = None) -> dict:
+        metadata = {"created_at": time.time(), **(metadata or {})}
+        return {"id": str(uuid.uuid4()), "text": text, "metadata": metadata}
+
+    def _build_vectorstore(self, records: list, vectors) -> FAISS:
+        """
+        Exact flat FAISS index over stored records and vectors (or vector blocks).
+        Adding to a flat index is a copy, so this stays fast at any size;
+        _maybe_rebuild_index() switches to HNSW/IVF off the calling thread.
+        """
+        index = build_index(vectors, "flat")
+        self._trained_count = index.ntotal
+
+        docstore = InMemoryDocstore({
+            record["id"]: Document(page_content=record["text"], metadata=record["metadata"])
+            for record in records
+        })
+        index_to_docstore_id = {i: record["id"] for i, record in enumerate(records)}
+
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
-        
-        # Load existing index or create new
-        index_path = os.path.join(persist_directory, "index.pkl")
-        if os.path.exists(index_path):
-            self.vectorstore = FAISS.load_local(persist_directory, self.embeddings,  allow_dangerous_deserialization=True)
-        else:
-            self.vectorstore = FAISS.from_texts(["Shared knowledge base initialized."], self.embeddings)
-            self.save()
-    
+
+    def _migrate_legacy_index(self, store: SegmentLogStore):
+        """One-off conversion of a pickled FAISS index (index.faiss/index.pkl)"""
+        index_path = os.path.join(self.persist_directory, "index.pkl")
+        if not os.path.exists(index_path):
+            return
+
+        legacy = FAISS.load_local(self.persist_directory, self.embeddings, allow_dangerous_deserialization=True)
+        vectors = legacy.index.reconstruct_n(0, legacy.index.ntotal)
+        records = []
+        for i in range(legacy.index.ntotal):
+            doc_id = legacy.index_to_docstore_id[i]
+            doc = legacy.docstore.search(doc_id)
+            records.append({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata})
+
+        store.write_snapshot(records, vectors)
+        print(f"📦 Migrated {len(records)} facts from legacy FAISS index")
+
+    def warm_up(self):
+        """Load the embedding model and index ahead of the first request"""
+        self._ensure_loaded()
+        self.embeddings.embed_query("warm up")
+        return self
+
+    @traced("compact", kind="faiss")
     def save(self):
-        """Persist vectorstore to disk"""
-        self.vectorstore.save_local(self.persist_directory)
-    
+        """Fold the segment log into a fresh snapshot on disk"""
+        self._ensure_loaded()
+        with self._rw_lock.write():
+            self._flush_access_stats()
+            self._store.compact()
+
     def save_fact(self, fact: str):
-        """Save important fact to shared memory"""
-        self.vectorstore.add_texts([fact])
-        self.save()
-        print(f"💾 Saved to shared memory: {fact[:50]}...")
-    
-    def search_relevant_facts(self, query: str, k: int = 3) -> list:
-        """Find relevant past knowledge for query"""
-        results = self.vectorstore.similarity_search(query, k=k)
-        return results
-    
-    def get_context(self, query: str) -> str:
+        """Save important fact to shared memory (queued when write-behind is on)"""
+        if self._writer is not None:
+            self._writer.submit(fact)
+            print(f"💾 Queued for shared memory: {fact[:50]}...")
+            return
+
+        self._write_facts([fact])
+
+    @traced("write", kind="faiss")
+    def _write_facts(self, facts: list):
+        """Embed a batch of facts in one call and append them to the segment log"""
+        # Embed outside the lock so searches are only blocked for the insert
+        vectors = np.asarray(self.embeddings.embed_documents(facts), dtype=np.float32)
+        vectorstore = self.vectorstore
+        records = [self._make_record(fact) for fact in facts]
+
+        with self._rw_lock.write():
+            duplicates = {}
+            if self.dedup_threshold is not None:
+                keep, duplicates = self._find_duplicates(vectorstore, vectors)
+                records = [records[i] for i in keep]
+                vectors = vectors[keep]
+                if duplicates and self.dedup_action == "refresh":
+                    self._refresh_facts(vectorstore, duplicates)
+
+            if records:
+                vectorstore.add_embeddings(
+                    [(record["text"], vector) for record, vector in zip(records, vectors)],
+                    metadatas=[record["metadata"] for record in records],
+                    ids=[record["id"] for record in records]
+                )
+                # Only the new facts hit disk; the full index is rewritten on compaction
+                self._store.append(records, vectors)
+                if self._rebuild_tail is not None:
+                    self._rebuild_tail.append(([record["id"] for record in records], vectors))
+
+            self._flush_access_stats()
+            self._evict_locked(vectorstore)
+
+            if self._store.needs_compaction():
+                self._store.compact()
+
+        self._maybe_rebuild_index()
+
+        for record in records:
+            print(f"💾 Saved to shared memory: {record['text'][:50]}...")
+        if duplicates:
+            print(f"♻️ Skipped {sum(duplicates.values())} near-duplicate facts ({self.dedup_action})")
+
+    def _find_duplicates(self, vectorstore: FAISS, vectors: np.ndarray):
+        """
+        Split a batch into rows to insert and near-duplicates of stored facts.
+        Returns (keep, {existing_id: count}); caller holds the write lock.
+        """
+        index = vectorstore.index
+        unit = unit_rows(vectors)
+        positions = self._nearest_live(vectorstore, vectors)
+
+        keep = []
+        duplicates = {}
+        for row, position in enumerate(positions):
+            if position != -1:
+                neighbour = unit_rows(index.reconstruct(int(position)))[0]
+                if float(neighbour @ unit[row]) >= self.dedup_threshold:
+                    doc_id = vectorstore.index_to_docstore_id[int(position)]
+                    duplicates[doc_id] = duplicates.get(doc_id, 0) + 1
+                    continue
+            # Repeats inside the same batch are dropped as well
+            if any(float(unit[other] @ unit[row]) >= self.dedup_threshold for other in keep):
+                continue
+            keep.append(row)
+
+        return keep, duplicates
+
+    def _nearest_live(self, vectorstore: FAISS, vectors: np.ndarray) -> list:
+        """
+        Position of each row's nearest non-tombstoned fact (-1 if none).
+        Over-fetches past tombstones like search_relevant_facts.
+        """
+        index = vectorstore.index
+        nearest = [-1] * len(vectors)
+        pending = list(range(len(vectors)))
+        fetch = 1 + min(len(self._tombstones), 3)
+
+        while pending and index.ntotal:
+            fetch = min(fetch, index.ntotal)
+            _, positions = index.search(vectors[pending], fetch)
+            unresolved = []
+            for row, candidates in zip(pending, positions):
+                for position in candidates:
+                    if position == -1:
+                        break
+                    if vectorstore.index_to_docstore_id[int(position)] not in self._tombstones:
+                        nearest[row] = int(position)
+                        break
+                else:
+                    unresolved.append(row)
+            if fetch >= index.ntotal:
+                break
+            pending = unresolved
+            fetch *= 2
+
+        return nearest
+
+    def _refresh_facts(self, vectorstore: FAISS, duplicates: dict):
+        """Bump refreshed_at and the duplicate count of existing facts"""
+        now = time.time()
+        updates = {}
+        for doc_id, count in duplicates.items():
+            metadata = vectorstore.docstore.search(doc_id).metadata
+            metadata.update(refreshed_at=now, duplicates=metadata.get("duplicates", 0) + count)
+            updates[doc_id] = {"refreshed_at": now, "duplicates": metadata["duplicates"]}
+        self._store.touch(updates)
+
+    def deduplicate(self, threshold: float = None) -> int:
+        """
+        One-off pass that folds near-duplicate facts already in the store into
+        their earliest copy. Returns the number of facts removed.
+        """
+        threshold = threshold if threshold is not None else (self.dedup_threshold or DEDUP_THRESHOLD)
+        self.flush()
+        vectorstore = self.vectorstore
+
+        with self._rw_lock.write():
+            self._flush_access_stats()
+            records, vectors = self._store.load()
+            owners = greedy_dedup(vectors, threshold)
+            keep = [row for row, owner in enumerate(owners) if owner == -1]
+            removed = len(records) - len(keep)
+            if not removed:
+                return 0
+
+            for row, owner in enumerate(owners):
+                if owner != -1:
+                    metadata = records[owner]["metadata"]
+                    metadata["duplicates"] = metadata.get("duplicates", 0) + 1
+
+            records = [records[row] for row in keep]
+            vectors = np.asarray(vectors[keep], dtype=np.float32)
+            self._store.write_snapshot(records, vectors)
+
+            # Swap in place so callers holding the vectorstore see the new contents
+            rebuilt = self._build_vectorstore(records, vectors)
+            vectorstore.index = rebuilt.index
+            vectorstore.docstore = rebuilt.docstore
+            vectorstore.index_to_docstore_id = rebuilt.index_to_docstore_id
+            self._tombstones.clear()
+
+        self._maybe_rebuild_index()
+        print(f"🧹 Removed {removed} near-duplicate facts from shared memory")
+        return removed
+
+    def _maybe_rebuild_index(self):
+        """
+        Start a background rebuild when the index kind no longer fits the size
+        or enough tombstones have piled up to be worth removing physically.
+        """
+        index = self.vectorstore.index
+        tombstoned = len(self._tombstones) >= max(1, TOMBSTONE_REBUILD_RATIO * index.ntotal)
+        if not tombstoned and not needs_rebuild(index, self._trained_count):
+            return
+        with self._rebuild_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild_index, name="shared-memory-index-rebuild", daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def _rebuild_index(self):
+        """
+        Build the new index from the stored vectors while searches keep using
+        the old one; facts written in the meantime are replayed before the swap.
+        """
+        vectorstore = self.vectorstore
+        try:
+            # The read lock keeps writers out so the snapshot and tail line up
+            with self._rw_lock.read():
+                self._rebuild_tail = []
+                records, vectors = self._store.load()
+
+            kind = select_index_kind(len(vectors))
+            started = time.perf_counter()
+            index = build_index(vectors, kind)
+            ids = [record["id"] for record in records]
+
+            with self._rw_lock.write():
+                for tail_ids, tail_vectors in self._rebuild_tail:
+                    index.add(tail_vectors)
+                    ids.extend(tail_ids)
+
+                # Deleted facts are gone from the store; the docstore keeps the
+                # in-memory metadata of the rest
+                live = set(ids)
+                if not live <= set(vectorstore.index_to_docstore_id.values()):
+                    print("⚠️ Shared memory index rebuild out of sync, keeping the old index")
+                    return
+                stale = [
+                    doc_id for doc_id in vectorstore.index_to_docstore_id.values()
+                    if doc_id not in live
+                ]
+                if stale:
+                    vectorstore.docstore.delete(stale)
+
+                vectorstore.index = index
+                vectorstore.index_to_docstore_id = dict(enumerate(ids))
+                self._tombstones &= live
+                self._trained_count = index.ntotal
+
+            print(f"🧭 Rebuilt shared memory index as {kind} ({index.ntotal} facts) in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"⚠️ Shared memory index rebuild failed: {e}")
+        finally:
+            self._rebuild_tail = None
+
+    def index_stats(self) -> dict:
+        if self._vectorstore is None:
+            return {"loaded": False}
+        index = self._vectorstore.index
+        return {
+            "loaded": True,
+            "kind": index_kind(index),
+            "facts": index.ntotal - len(self._tombstones),
+            "tombstones": len(self._tombstones),
+            "evicted": self._evicted,
+            "max_facts": self.max_facts,
+            "eviction_policy": self.eviction_policy,
+            "rebuilding": self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+        }
+
+    # -------- EVICTION -------- #
+
+    def _record_access(self, results: list):
+        """Count a retrieval hit on each returned (doc_id, doc)"""
+        now = time.time()
+        with self._access_lock:
+            for doc_id, doc in results:
+                doc.metadata["hits"] = doc.metadata.get("hits", 0) + 1
+                doc.metadata["last_retrieved_at"] = now
+                self._access_updates[doc_id] = {
+                    "hits": doc.metadata["hits"],
+                    "last_retrieved_at": now
+                }
+
+    def _flush_access_stats(self):
+        """Write pending retrieval stats to the segment log as one batch of touches"""
+        with self._access_lock:
+            updates, self._access_updates = self._access_updates, {}
+        updates = {doc_id: meta for doc_id, meta in updates.items() if doc_id not in self._tombstones}
+        if updates:
+            self._store.touch(updates)
+
+    def _live_items(self, vectorstore: FAISS):
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            if doc_id not in self._tombstones:
+                yield doc_id, vectorstore.docstore.search(doc_id).metadata
+
+    def _evict_locked(self, vectorstore: FAISS, force_ttl: bool = False) -> int:
+        """Apply the TTL and capacity limits; caller holds the write lock"""
+        victims = []
+        now = time.time()
+
+        if self.fact_ttl and (force_ttl or now - self._last_ttl_sweep >= TTL_SWEEP_INTERVAL):
+            self._last_ttl_sweep = now
+            victims = expired_ids(self._live_items(vectorstore), self.fact_ttl, now)
+
+        live_count = vectorstore.index.ntotal - len(self._tombstones) - len(victims)
+        if self.max_facts and live_count > self.max_facts:
+            expired = set(victims)
+            candidates = (item for item in self._live_items(vectorstore) if item[0] not in expired)
+            victims += select_victims(candidates, self.max_facts, self.eviction_policy)
+
+        if victims:
+            self._store.delete(victims)
+            self._tombstones.update(victims)
+            self._evicted += len(victims)
+            print(f"🗑️ Evicted {len(victims)} facts from shared memory ({self.eviction_policy})")
+        return len(victims)
+
+    def evict(self) -> int:
+        """Apply the TTL and capacity limits now; returns the number of evicted facts"""
+        vectorstore = self.vectorstore
+        with self._rw_lock.write():
+            evicted = self._evict_locked(vectorstore, force_ttl=True)
+        self._maybe_rebuild_index()
+        return evicted
+
+    def flush(self):
+        """Block until every queued fact and retrieval stat is persisted"""
+        if self._writer is not None:
+            self._writer.flush()
+        if self._store is not None:
+            self._flush_access_stats()
+
+    @traced("search", kind="faiss")
+    def search_relevant_facts(
+        self,
+        query: str,
+        k: int = 3,
+        query_vector=None,
+        ef_search: int = None,
+        nprobe: int = None
+    ) -> list:
+        """
+        Find relevant past knowledge for query (reuses query_vector when given).
+        ef_search (HNSW) and nprobe (IVF) trade latency for recall per call;
+        they are ignored by the exact flat index.
+        """
+        vector = query_vector if query_vector is not None else self.embeddings.embed_query(query)
+        vector = np.asarray([vector], dtype=np.float32)
+        vectorstore = self.vectorstore
+
+        with self._rw_lock.read():
+            index = vectorstore.index
+            params = search_params(index, ef_search, nprobe)
+
+            # Over-fetch until k live facts are found past the tombstones
+            fetch = k
+            doc_ids = []
+            while index.ntotal:
+                fetch = min(fetch, index.ntotal)
+                _, positions = index.search(vector, fetch, params=params)
+                doc_ids = [
+                    vectorstore.index_to_docstore_id[i]
+                    for i in positions[0]
+                    if i != -1
+                ]
+                doc_ids = [doc_id for doc_id in doc_ids if doc_id not in self._tombstones][:k]
+                if len(doc_ids) == k or fetch >= index.ntotal or not self._tombstones:
+                    break
+                fetch *= 2
+
+            results = [(doc_id, vectorstore.docstore.search(doc_id)) for doc_id in doc_ids]
+            self._record_access(results)
+
+        return [doc for _, doc in results]
+
+    def get_context(self, query: str, query_vector=None) -> str:
         """Get formatted context from shared memory"""
-        docs = self.search_relevant_facts(query)
+        docs = self.search_relevant_facts(query, query_vector=query_vector)
         if not docs:
             return "No relevant past knowledge found."
-        
+
         context = "Shared Knowledge Base:\n"
         for i, doc in enumerate(docs, 1):
             context += f"{i}. {doc.page_content}\n"
-        return context
\ No newline at end of file
+        return context
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_shared_memory(persist_directory: str = DEFAULT_PERSIST_DIRECTORY) -> SharedKnowledgeBase:
+    """Return the process-wide SharedKnowledgeBase for a directory (not loaded until used)"""
+    key = os.path.abspath(persist_directory)
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = SharedKnowledgeBase(persist_directory)
+            _instances[key] = instance
+    return instance
+
+
+def warm_up_shared_memory(persist_directory: str = DEFAULT_PERSIST_DIRECTORY) -> SharedKnowledgeBase:
+    """Startup hook: load the embedding model and FAISS index eagerly"""
+    return get_shared_memory(persist_directory).warm_up()
+
+
+def flush_shared_memory():
+    """Shutdown hook: persist queued facts of every shared instance"""
+    with _instances_lock:
+        instances = list(_instances.values())
+    for instance in instances:
+        instance.flush()
+
+
+# Queued facts must survive a normal interpreter exit too (CLI, scripts)
+atexit.register(flush_shared_memory)
@@ -1,5 +1,6 @@
-from memory import AgentMemory
-from shared_memory import SharedKnowledgeBase
+# Run from the repository root: python -m src.test_chat_history
+from src.memory import AgentMemory
+from src.shared_memory import SharedKnowledgeBase
 
 print("🧠 Testing YOUR Memory Integration")
 
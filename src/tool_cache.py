@@ -0,0 +1,164 @@
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+
+# Declarative result cache for @tool functions.
+# A tool opts in with @cache_tool_result(name, ttl); ttl=None marks a pure
+# tool whose results never go stale (they only leave the LRU). Entries are
+# keyed by tool name + call arguments and shared between the sync and async
+# variants of a tool. Tools with side effects or deliberately random output
+# are listed in UNCACHEABLE_TOOLS and cannot be decorated.
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+
+UNCACHEABLE_TOOLS = frozenset({"write_file", "append_file", "gen_password"})
+
+# Per-tool TTL overrides in seconds, e.g. TOOL_CACHE_TTLS="web_search=1800,get_weather=300"
+# (0 disables caching for that tool)
+TOOL_CACHE_TTL_OVERRIDES = {}
+for _item in os.getenv("TOOL_CACHE_TTLS", "").split(","):
+    if "=" in _item:
+        _name, _ttl = _item.split("=", 1)
+        TOOL_CACHE_TTL_OVERRIDES[_name.strip()] = float(_ttl)
+
+_MISSING = object()
+
+
+def _key(tool_name: str, args: tuple, kwargs: dict) -> str:
+    payload = json.dumps([tool_name, args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """Bounded LRU of tool results with a per-entry expiry"""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.ttls = {}
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _tool_stats(self, tool_name: str) -> dict:
+        # Caller holds the lock
+        return self._stats.setdefault(
+            tool_name, {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        )
+
+    def get(self, tool_name: str, key: str):
+        now = time.time()
+        with self._lock:
+            stats = self._tool_stats(tool_name)
+            entry = self._entries.get(key)
+            if entry is None:
+                stats["misses"] += 1
+                return _MISSING
+
+            _, expires_at, result = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                stats["expired"] += 1
+                stats["misses"] += 1
+                return _MISSING
+
+            self._entries.move_to_end(key)
+            stats["hits"] += 1
+            return result
+
+    def put(self, tool_name: str, key: str, result, ttl: float = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (tool_name, expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, (owner, _, _) = self._entries.popitem(last=False)
+                self._tool_stats(owner)["evictions"] += 1
+
+    def clear(self, tool_name: str = None):
+        with self._lock:
+            if tool_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry[0] == tool_name]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {name: dict(stats) for name, stats in self._stats.items()}
+            entries = len(self._entries)
+
+        for name, stats in tools.items():
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["ttl"] = self.ttls.get(name)
+
+        hits = sum(stats["hits"] for stats in tools.values())
+        lookups = hits + sum(stats["misses"] for stats in tools.values())
+        return {
+            "enabled": TOOL_CACHE_ENABLED,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "tools": tools,
+        }
+
+
+tool_cache = ToolResultCache()
+
+
+def cache_tool_result(tool_name: str, ttl: float = None, cache_if=None):
+    """
+    Decorator that reuses a tool's result for ttl seconds (forever for pure
+    tools with ttl=None). cache_if(result) -> bool keeps error results out
+    of the cache. Works for sync and async tool functions.
+    """
+    if tool_name in UNCACHEABLE_TOOLS:
+        raise ValueError(f"Tool '{tool_name}' has side effects and must not be cached")
+
+    ttl = TOOL_CACHE_TTL_OVERRIDES.get(tool_name, ttl)
+    enabled = TOOL_CACHE_ENABLED and (ttl is None or ttl > 0)
+    if enabled:
+        tool_cache.ttls[tool_name] = ttl
+
+    def store(key, result):
+        if cache_if is None or cache_if(result):
+            tool_cache.put(tool_name, key, result, ttl)
+
+    def decorator(fn):
+        if not enabled:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = _key(tool_name, args, kwargs)
+                result = tool_cache.get(tool_name, key)
+                if result is not _MISSING:
+                    return result
+                result = await fn(*args, **kwargs)
+                store(key, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _key(tool_name, args, kwargs)
+            result = tool_cache.get(tool_name, key)
+            if result is not _MISSING:
+                return result
+            result = fn(*args, **kwargs)
+            store(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def tool_cache_stats() -> dict:
+    return tool_cache.stats()
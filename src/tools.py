@@ -1,4 +1,5 @@
 
+import httpx
 import requests
 from langchain_core.tools import tool
 import ast
@@ -9,60 +10,80 @@ from datetime import datetime, timezone, timedelta
 import functools
 import json
 import os
-import time
 import re
+import asyncio
+import inspect
+import threading
 from pathlib import Path
 from typing import List
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, TavilyClient
+from src.http_pool import HTTP_TIMEOUT, LoopLocal, get_async_http_client, get_http_session
+from src.tool_cache import cache_tool_result
+from src.tracing import record_event, traced
 
 
-# Milestone 2
-def log_tool(tool_name: str):
+# Tool calls from one model turn run in parallel (one graph task each).
+# These caps bound how many calls of a single network-bound tool run at
+# once; override with TOOL_CONCURRENCY_LIMITS="web_search=3,get_weather=4".
+TOOL_CONCURRENCY_LIMITS = {"web_search": 3, "get_weather": 4}
+for _item in os.getenv("TOOL_CONCURRENCY_LIMITS", "").split(","):
+    if "=" in _item:
+        _name, _limit = _item.split("=", 1)
+        TOOL_CONCURRENCY_LIMITS[_name.strip()] = int(_limit)
+
+_tool_semaphores = {}
+_tool_semaphores_lock = threading.Lock()
+_async_tool_semaphores = LoopLocal()
+
+
+def limit_concurrency(tool_name: str):
     """
-    Decorator that prints Thought/Action/Action Input/Observation blocks
-    when the tool is executed. Keeps the original function behavior.
+    Decorator that caps concurrent executions of a tool at its entry in
+    TOOL_CONCURRENCY_LIMITS (no cap when missing or <= 0).
     """
     def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                limit = TOOL_CONCURRENCY_LIMITS.get(tool_name, 0)
+                if limit <= 0:
+                    return await fn(*args, **kwargs)
+
+                # asyncio semaphores belong to one event loop
+                semaphore = _async_tool_semaphores.get(tool_name, lambda: asyncio.Semaphore(limit))
+
+                async with semaphore:
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
-            # Thought: ideally produced by the agent; we produce a helpful hint
-            print("\n# Thought: I should use the", tool_name, "tool.")
-            print("# Action:", tool_name)
-
-            # Format the action input (args/kwargs) nicely
-            try:
-                if kwargs and args:
-                    action_input = {"args": args, "kwargs": kwargs}
-                elif kwargs:
-                    action_input = kwargs
-                else:
-                    # if single arg, print it plainly
-                    action_input = args[0] if len(args) == 1 else args
-                action_input_str = json.dumps(action_input, default=str)
-            except Exception:
-                action_input_str = str(action_input)
-
-            print("# Action Input:", action_input_str)
-
-            # Execute tool and capture the result
-            start = time.time()
-            result = fn(*args, **kwargs)
-            duration = time.time() - start
-
-            # Observation: show tool output
-            # Keep it one-line if it's long
-            obs = result
-            if isinstance(obs, str) and "\n" in obs:
-                obs = obs.splitlines()[0] + " ..."
-
-            print("# Observation:", obs)
-            print(f"# (tool runtime: {duration:.3f}s)\n")
-
-            return result
+            limit = TOOL_CONCURRENCY_LIMITS.get(tool_name, 0)
+            if limit <= 0:
+                return fn(*args, **kwargs)
+
+            with _tool_semaphores_lock:
+                semaphore = _tool_semaphores.get(tool_name)
+                if semaphore is None:
+                    semaphore = threading.BoundedSemaphore(limit)
+                    _tool_semaphores[tool_name] = semaphore
+
+            with semaphore:
+                return fn(*args, **kwargs)
         return wrapper
     return decorator
 
 
+# Milestone 2
+def log_tool(tool_name: str):
+    """
+    Decorator that records every call of the tool as a "tool" span with its
+    input and (truncated) output. TRACE_MODE=print echoes spans to stdout.
+    Works for sync and async tool functions.
+    """
+    return traced(tool_name, kind="tool", record_args=True, record_result=True)
+
+
 # WEEK - 2 upgrades
 @tool
 @log_tool("greet")
@@ -74,8 +95,26 @@ def greet(name: str) -> str:
     return f"Hello {name}, I am your LangChain Agent powered by Gemini!"
 
 
+WEATHER_URL = "https://wttr.in/{city}?format=j1"
+
+
+def format_weather(city: str, data: dict) -> str:
+    current = data.get("current_condition", [])
+    if not current:
+        return f"Could not read weather for {city}."
+    temp_c = current[0].get("temp_C")
+    area = data.get("nearest_area", [{}])[0].get("areaName", [{}])[0].get("value", city)
+    return f"Current temperature in {area} is {temp_c}°C"
+
+
+def weather_ok(result: str) -> bool:
+    return not result.startswith(("Please provide", "Could not read", "Weather API error", "Unexpected error"))
+
+
 @tool
 @log_tool("get_weather")
+@cache_tool_result("get_weather", ttl=600, cache_if=weather_ok)
+@limit_concurrency("get_weather")
 def get_weather(city: str) -> str:
     """Get current temperature of a city. Input should be the city name."""
     city = city.strip() or ""
@@ -83,23 +122,39 @@ def get_weather(city: str) -> str:
         return "Please provide a city name."
 
     try:
-        url = f"https://wttr.in/{city}?format=j1"
-        res = requests.get(url, timeout=10)
+        res = get_http_session("weather").get(WEATHER_URL.format(city=city), timeout=HTTP_TIMEOUT)
         res.raise_for_status()
-        data = res.json()
-        current = data.get("current_condition", [])
-        if not current:
-            return f"Could not read weather for {city}."
-        temp_c = current[0].get("temp_C")
-        area = data.get("nearest_area", [{}])[0].get("areaName", [{}])[0].get("value", city)
-        return f"Current temperature in {area} is {temp_c}°C"
+        return format_weather(city, res.json())
     except requests.RequestException as e:
         return f"Weather API error: {e}"
     except Exception as e:
         return f"Unexpected error while fetching weather: {e}"
 
+
+@log_tool("get_weather")
+@cache_tool_result("get_weather", ttl=600, cache_if=weather_ok)
+@limit_concurrency("get_weather")
+async def aget_weather(city: str) -> str:
+    """Async get_weather for the async orchestrator path (pooled httpx client)"""
+    city = city.strip() or ""
+    if not city:
+        return "Please provide a city name."
+
+    try:
+        res = await get_async_http_client("weather").get(WEATHER_URL.format(city=city))
+        res.raise_for_status()
+        return format_weather(city, res.json())
+    except httpx.HTTPError as e:
+        return f"Weather API error: {e}"
+    except Exception as e:
+        return f"Unexpected error while fetching weather: {e}"
+
+
+get_weather.coroutine = aget_weather
+
 @tool
 @log_tool("calculate")
+@cache_tool_result("calculate")
 def calculate(expression: str) -> str:
     """
     Safely evaluate a math expression and return the result.
@@ -308,6 +363,7 @@ def append_file(path: str, content: str) -> str:
 
 #Text Analyzer Tool
 @tool
+@log_tool("analyze_text")
 def analyze_text(text: str) -> str:
     """
     Analyze text and extract key points.
@@ -331,6 +387,8 @@ def analyze_text(text: str) -> str:
 
 #Keyword Extractor Tool
 @tool
+@log_tool("extract_keywords")
+@cache_tool_result("extract_keywords")
 def extract_keywords(text: str, top_k: int = 5) -> str:
     """
     Extract important keywords from text.
@@ -351,6 +409,7 @@ def extract_keywords(text: str, top_k: int = 5) -> str:
 
 #Task Decomposer Tool
 @tool
+@log_tool("decompose_task")
 def decompose_task(goal: str) -> str:
     """
     Break a goal into structured subtasks.
@@ -373,24 +432,19 @@ def decompose_task(goal: str) -> str:
 
 #Agent Logger / Trace Tool
 @tool
+@log_tool("log_agent_step")
 def log_agent_step(agent_name: str, action: str) -> str:
     """
     Log what an agent is doing at a specific step.
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    log_entry = {
-        "agent": agent_name,
-        "action": action,
-        "time": timestamp
-    }
-
-    print(f"[AGENT LOG] {log_entry}")
+    # The event span carries the timestamp
+    record_event("agent_step", agent=agent_name, action=action)
 
     return "Agent step logged successfully."
 
 #Shared Memory Search Tool
 @tool
+@log_tool("search_shared_memory")
 def search_shared_memory(query: str, memory_context: str) -> str:
     """
     Search shared memory context for relevant information.
@@ -418,6 +472,7 @@ def search_shared_memory(query: str, memory_context: str) -> str:
 
 #Shared Memory Save
 @tool
+@log_tool("prepare_memory_entry")
 def prepare_memory_entry(content: str, tag: str = "general") -> str:
     """
     Prepare a structured memory entry to store in shared memory.
@@ -435,6 +490,7 @@ def prepare_memory_entry(content: str, tag: str = "general") -> str:
 
 #JSON Structurer Tool
 @tool
+@log_tool("structure_as_json")
 def structure_as_json(title: str, points: List[str]) -> str:
     """
     Convert text points into structured JSON.
@@ -451,6 +507,7 @@ def structure_as_json(title: str, points: List[str]) -> str:
 
 #Table Generator Tool
 @tool
+@log_tool("generate_markdown_table")
 def generate_markdown_table(headers: List[str], rows: List[List[str]]) -> str:
     """
     Generate a markdown table from headers and rows.
@@ -466,7 +523,58 @@ def generate_markdown_table(headers: List[str], rows: List[List[str]]) -> str:
 
     return table
 
+_tavily_clients = {}
+_async_tavily_clients = LoopLocal()
+
+
+def get_tavily_client(api_key: str) -> TavilyClient:
+    """Reused Tavily client on its own pooled session (not rebuilt per call)"""
+    client = _tavily_clients.get(api_key)
+    if client is None:
+        try:
+            client = TavilyClient(api_key=api_key, session=get_http_session("tavily"))
+        except TypeError:
+            # Older tavily-python releases manage their own session
+            client = TavilyClient(api_key=api_key)
+        _tavily_clients[api_key] = client
+    return client
+
+
+def get_async_tavily_client(api_key: str) -> AsyncTavilyClient:
+    def build():
+        try:
+            return AsyncTavilyClient(api_key=api_key, client=get_async_http_client("tavily"))
+        except TypeError:
+            return AsyncTavilyClient(api_key=api_key)
+
+    return _async_tavily_clients.get(api_key, build)
+
+
+def format_search_results(response: dict) -> str:
+    results = response.get("results", [])
+    if not results:
+        return "No relevant results found."
+
+    formatted = []
+    for r in results:
+        title = r.get("title", "No title")
+        content = r.get("content", "")
+        url = r.get("url", "")
+        formatted.append(f"{title}: {content} ({url})")
+
+    return "Top web results:\n" + "\n".join(
+        f"- {item}" for item in formatted
+    )
+
+
+def search_ok(result: str) -> bool:
+    return not result.startswith(("No search query", "Tavily API key", "Web search error"))
+
+
 @tool
+@log_tool("web_search")
+@cache_tool_result("web_search", ttl=3600, cache_if=search_ok)
+@limit_concurrency("web_search")
 def web_search(query: str) -> str:
     """
     Perform a real web search using Tavily API.
@@ -481,33 +589,45 @@ def web_search(query: str) -> str:
         return "Tavily API key not configured."
 
     try:
-        client = TavilyClient(api_key=api_key)
-
-        response = client.search(
+        response = get_tavily_client(api_key).search(
             query=query,
             search_depth="basic",   # fast + enough for trends
             max_results=5
         )
+        return format_search_results(response)
+
+    except Exception as e:
+        return f"Web search error: {e}"
+
+
+@log_tool("web_search")
+@cache_tool_result("web_search", ttl=3600, cache_if=search_ok)
+@limit_concurrency("web_search")
+async def aweb_search(query: str) -> str:
+    """Async web_search for the async orchestrator path"""
+    if not query:
+        return "No search query provided."
 
-        results = response.get("results", [])
-        if not results:
-            return "No relevant results found."
+    api_key = os.getenv("TAVILY_API_KEY")
 
-        formatted = []
-        for r in results:
-            title = r.get("title", "No title")
-            content = r.get("content", "")
-            url = r.get("url", "")
-            formatted.append(f"{title}: {content} ({url})")
+    if not api_key:
+        return "Tavily API key not configured."
 
-        return "Top web results:\n" + "\n".join(
-            f"- {item}" for item in formatted
+    try:
+        response = await get_async_tavily_client(api_key).search(
+            query=query,
+            search_depth="basic",
+            max_results=5
         )
+        return format_search_results(response)
 
     except Exception as e:
         return f"Web search error: {e}"
 
 
+web_search.coroutine = aweb_search
+
+
 def get_tools():
     """Return a list of tool functions decorated with @tool."""
     return [
@@ -0,0 +1,302 @@
+from collections import deque
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from src.metrics import METRICS_ENABLED, observe_span
+
+# Span-based tracing for the router, agent invokes and tool calls.
+# TRACE_MODE:
+#   off   - decorators return the function unchanged and span() is a no-op
+#   ring  - finished spans go to an in-memory ring buffer (served on /traces)
+#   print - ring buffer plus one stdout line per span, for local debugging
+# With TRACE_EXPORT_PATH set, finished spans are also appended to a JSONL
+# file by a background thread, so request threads never block on disk or
+# stdout. Parent/child links follow contextvars, which LangChain and
+# asyncio.to_thread copy into worker threads.
+# Finished spans also feed the /metrics histograms (src/metrics.py), so
+# spans are still timed when TRACE_MODE=off but METRICS_ENABLED is on.
+
+TRACE_MODE = os.getenv("TRACE_MODE", "ring").lower()
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2048"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_MAX_ATTR_CHARS = int(os.getenv("TRACE_MAX_ATTR_CHARS", "200"))
+TRACE_EXPORT_BATCH = 256
+
+TRACING_ENABLED = TRACE_MODE in ("ring", "print")
+INSTRUMENTED = TRACING_ENABLED or METRICS_ENABLED
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def summarize(value):
+    """Short, JSON-safe rendering of an attribute value"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > TRACE_MAX_ATTR_CHARS:
+        text = text[:TRACE_MAX_ATTR_CHARS] + "…"
+    return text
+
+
+class Span:
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id",
+        "start", "duration", "attrs", "status", "error", "root", "deferred", "_token"
+    )
+
+    def __init__(self, name: str, kind: str, attrs: dict):
+        parent = _current_span.get()
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.root = parent.root if parent is not None else self
+        self.deferred = []
+        self.attrs = attrs
+        self.status = "ok"
+        self.error = None
+        self.duration = None
+        self._token = None
+
+    def set(self, **attrs):
+        for key, value in attrs.items():
+            self.attrs[key] = summarize(value)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.time() - self.start
+        if exc is not None:
+            self.status = "error"
+            self.error = summarize(f"{exc_type.__name__}: {exc}")
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned async generator)
+            pass
+        tracer.record(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Shared stand-in used when tracing is off"""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Ring buffer of finished spans plus the optional JSONL exporter"""
+
+    def __init__(
+        self,
+        buffer_size: int = TRACE_BUFFER_SIZE,
+        export_path: str = TRACE_EXPORT_PATH,
+        print_spans: bool = TRACE_MODE == "print"
+    ):
+        self.export_path = export_path
+        self.print_spans = print_spans
+
+        self._spans = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._stats = {"spans": 0, "errors": 0, "exported": 0, "export_dropped": 0}
+
+        self._queue = None
+        self._exporter = None
+        if export_path:
+            self._queue = queue.Queue(maxsize=buffer_size * 4)
+            self._exporter = threading.Thread(target=self._export_loop, daemon=True, name="trace-exporter")
+            self._exporter.start()
+
+    def record(self, span: Span):
+        if METRICS_ENABLED:
+            observe_span(span)
+        if not TRACING_ENABLED:
+            return
+
+        with self._lock:
+            self._spans.append(span)
+            self._stats["spans"] += 1
+            if span.status == "error":
+                self._stats["errors"] += 1
+
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                with self._lock:
+                    self._stats["export_dropped"] += 1
+
+        if self.print_spans:
+            self._print(span)
+
+    def _print(self, span: Span):
+        attrs = " ".join(f"{key}={value}" for key, value in span.attrs.items())
+        marker = "❌" if span.status == "error" else "🧵"
+        print(
+            f"{marker} [{span.trace_id[:8]}] {span.kind}:{span.name} "
+            f"{span.duration:.3f}s {attrs}{' ' + span.error if span.error else ''}"
+        )
+
+    def _export_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < TRACE_EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # None marks a flush request; write what came before it
+            spans = [span for span in batch if span is not None]
+            try:
+                if spans:
+                    with open(self.export_path, "a", encoding="utf-8") as f:
+                        for span in spans:
+                            f.write(json.dumps(span.to_dict(), default=str) + "\n")
+                    with self._lock:
+                        self._stats["exported"] += len(spans)
+            except Exception as e:
+                print(f"⚠️ Trace export failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued span has been written"""
+        if self._queue is not None:
+            self._queue.put(None)
+            self._queue.join()
+
+    def recent(self, limit: int = 100, trace_id: str = None) -> list:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        return [span.to_dict() for span in spans[-limit:]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buffered"] = len(self._spans)
+        stats["mode"] = TRACE_MODE
+        stats["export_path"] = self.export_path or None
+        return stats
+
+
+tracer = Tracer()
+
+
+def span(name: str, kind: str = "internal", **attrs):
+    """Context manager timing one unit of work (no-op when tracing and metrics are off)"""
+    if not INSTRUMENTED:
+        return _NOOP_SPAN
+    return Span(name, kind, {key: summarize(value) for key, value in attrs.items()})
+
+
+def current_span():
+    current = _current_span.get() if INSTRUMENTED else None
+    return current if current is not None else _NOOP_SPAN
+
+
+def record_event(name: str, **attrs):
+    """Zero-duration span under the current trace"""
+    with span(name, kind="event", **attrs):
+        pass
+
+
+def traced(name: str, kind: str = "internal", record_args: bool = False, record_result: bool = False):
+    """
+    Decorator wrapping each call in a span. Handles sync functions,
+    coroutines and async generators; returns fn unchanged when tracing and
+    metrics are both off.
+    """
+    record_args = record_args and TRACING_ENABLED
+    record_result = record_result and TRACING_ENABLED
+
+    def decorator(fn):
+        if not INSTRUMENTED:
+            return fn
+
+        def start(args, kwargs):
+            attrs = {}
+            if record_args:
+                if args:
+                    attrs["args"] = summarize(args[0] if len(args) == 1 else args)
+                for key, value in kwargs.items():
+                    attrs[key] = summarize(value)
+            return Span(name, kind, attrs)
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def agen_wrapper(*args, **kwargs):
+                with start(args, kwargs):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with start(args, kwargs) as current:
+                    result = await fn(*args, **kwargs)
+                    if record_result:
+                        current.set(result=result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start(args, kwargs) as current:
+                result = fn(*args, **kwargs)
+                if record_result:
+                    current.set(result=result)
+                return result
+        return wrapper
+    return decorator
+
+
+def recent_spans(limit: int = 100, trace_id: str = None) -> list:
+    return tracer.recent(limit, trace_id)
+
+
+def flush_traces():
+    tracer.flush()
+
+
+def tracing_stats() -> dict:
+    return tracer.stats()